@@ -0,0 +1 @@
+"""Ad-hoc performance benchmarks. Run from the repo root, e.g. `python -m benchmarks.parallel_scan`."""
@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import List
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+SAMPLE_DIRS = [REPO_ROOT / "test" / "scan-test-cases", REPO_ROOT / "test" / "workflows"]
+
+
+def sample_workflows() -> List[str]:
+    """Workflow texts shipped under test/, used as seeds for synthetic corpora."""
+    texts: List[str] = []
+    for d in SAMPLE_DIRS:
+        for p in sorted(d.glob("*.yml")):
+            texts.append(p.read_text(encoding="utf-8"))
+    return texts
+
+
+def write_corpus(dest: Path, n_files: int) -> List[Path]:
+    """Write `n_files` workflow files into `dest` by cycling through the samples."""
+    samples = sample_workflows()
+    dest.mkdir(parents=True, exist_ok=True)
+    paths: List[Path] = []
+    for i in range(n_files):
+        p = dest / f"wf-{i:05d}.yml"
+        p.write_text(samples[i % len(samples)], encoding="utf-8")
+        paths.append(p)
+    return paths
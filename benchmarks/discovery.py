@@ -0,0 +1,56 @@
+"""Workflow discovery: two `rglob` walks vs one pruning `os.scandir` walk over a synthetic monorepo.
+
+    python -m benchmarks.discovery --packages 200
+"""
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from scanner.utils.discovery import Discovery
+
+from ._corpus import sample_workflows
+
+
+def write_tree(root: Path, packages: int) -> None:
+    """A repo with a few workflows, many packages with node_modules and config YAML, and a .git dir."""
+    wf = sample_workflows()[0]
+    (root / ".github" / "workflows").mkdir(parents=True)
+    for i in range(5):
+        (root / ".github" / "workflows" / f"ci-{i}.yml").write_text(wf, encoding="utf-8")
+    (root / ".git" / "objects").mkdir(parents=True)
+    for i in range(packages):
+        pkg = root / "packages" / f"pkg-{i}"
+        mods = pkg / "node_modules" / "dep" / "lib"
+        mods.mkdir(parents=True)
+        for j in range(20):
+            (mods / f"file-{j}.js").write_text("", encoding="utf-8")
+        (mods / "config.yml").write_text("a: 1\n", encoding="utf-8")
+        (pkg / "config.yaml").write_text("a: 1\n", encoding="utf-8")
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--packages", type=int, default=200)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        write_tree(root, args.packages)
+
+        t0 = time.perf_counter()
+        legacy = list(root.rglob("*.yml")) + list(root.rglob("*.yaml"))
+        dt = time.perf_counter() - t0
+        print(f"{'rglob x2':>16}: {dt:.3f}s  {len(legacy)} files")
+
+        for label, d in (("scandir", Discovery()), ("workflows-only", Discovery(workflows_only=True))):
+            found = d.collect(root)
+            st = d.stats
+            print(f"{label:>16}: {st.seconds:.3f}s  {len(found)} files, {st.dirs} dirs walked, {st.pruned} pruned")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,54 @@
+"""WorkflowIR binary codec: encode/decode cost and size vs pickle and re-parsing.
+
+    python -m benchmarks.ir_codec --repeat 50
+
+Round-trip correctness is covered by test/test_ir_codec.py.
+"""
+from __future__ import annotations
+
+import argparse
+import pickle
+import time
+from typing import Callable, List
+
+from scanner.ir.codec import decode_workflow, encode_workflow
+from scanner.ir.derivation import derive_workflow
+from scanner.ir.models import WorkflowIR
+from scanner.ir.parser import parse_workflow_yaml
+
+from ._corpus import REPO_ROOT
+
+
+def bench(label: str, wfs: List[WorkflowIR], dumps: Callable, loads: Callable) -> None:
+    t0 = time.perf_counter()
+    blobs = [dumps(wf) for wf in wfs]
+    enc = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for b in blobs:
+        loads(b)
+    dec = time.perf_counter() - t0
+    n = len(wfs)
+    size = sum(len(b) for b in blobs) / n
+    print(f"{label:>8}: {size:7.0f} B/file  encode {enc / n * 1e6:6.1f}us  decode {dec / n * 1e6:6.1f}us")
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--repeat", type=int, default=50)
+    args = ap.parse_args()
+
+    paths = sorted(p for p in (REPO_ROOT / "test").rglob("*") if p.suffix in (".yml", ".yaml"))
+    wfs = [derive_workflow(parse_workflow_yaml(str(p), p.read_text(encoding="utf-8"))) for p in paths]
+    corpus = wfs * args.repeat
+    bench("codec", corpus, encode_workflow, decode_workflow)
+    bench("pickle", corpus, pickle.dumps, pickle.loads)
+
+    t0 = time.perf_counter()
+    for wf in corpus:
+        derive_workflow(parse_workflow_yaml(wf.file_path, wf.source_text))
+    print(f"{'reparse':>8}: {(time.perf_counter() - t0) / len(corpus) * 1e6:31.1f}us")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,72 @@
+"""Memory retained by parsed+derived WorkflowIR over a synthetic corpus (default 100k steps).
+
+    python -m benchmarks.ir_memory --workflows 1000 --jobs-per-workflow 10 --steps-per-job 10
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import time
+import tracemalloc
+from typing import List
+
+from scanner.ir.derivation import derive_workflow
+from scanner.ir.models import WorkflowIR
+from scanner.ir.parser import parse_workflow_yaml
+
+_STEPS = [
+    "      - uses: actions/checkout@v4\n",
+    "      - uses: actions/setup-node@v4\n        with:\n          node-version: 20\n          cache: npm\n",
+    "      - name: Build\n        run: npm ci && npm run build\n",
+    "      - name: Test\n        env:\n          CI: 'true'\n          NODE_ENV: test\n        run: npm test -- --ci\n",
+    "      - uses: actions/upload-artifact@v4\n        with:\n          name: dist\n          path: dist/\n",
+    "      - uses: azure/login@a65d910e8af852a8061c627c456678983e180302\n        with:\n          client-id: x\n",
+    "      - run: |\n          echo \"deploying ${{ github.sha }}\"\n          az account show\n",
+]
+
+
+def synthetic_workflow(i: int, jobs: int, steps: int) -> str:
+    lines = [f"name: wf-{i}\n", "on: [push, pull_request]\n", "permissions:\n  contents: read\n", "jobs:\n"]
+    for j in range(jobs):
+        lines.append(f"  job-{j}:\n    runs-on: ubuntu-latest\n    steps:\n")
+        for s in range(steps):
+            lines.append(_STEPS[(i + j + s) % len(_STEPS)])
+    return "".join(lines)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--workflows", type=int, default=1000)
+    ap.add_argument("--jobs-per-workflow", type=int, default=10)
+    ap.add_argument("--steps-per-job", type=int, default=10)
+    args = ap.parse_args()
+
+    texts = [synthetic_workflow(i, args.jobs_per_workflow, args.steps_per_job) for i in range(args.workflows)]
+    n_steps = args.workflows * args.jobs_per_workflow * args.steps_per_job
+
+    gc.collect()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    t0 = time.perf_counter()
+    wfs: List[WorkflowIR] = [derive_workflow(parse_workflow_yaml(f"wf-{i}.yml", t)) for i, t in enumerate(texts)]
+    dt = time.perf_counter() - t0
+    gc.collect()
+    with_source = tracemalloc.get_traced_memory()[0] - base
+
+    # Cross-repo analysis keeps only the IR; source text and line index are per-file scratch.
+    for wf in wfs:
+        wf.source_text = None
+        wf.source_index = None
+    gc.collect()
+    ir_only = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+
+    mib = 1024 * 1024
+    print(f"workflows={len(wfs)} steps={n_steps} parse+derive={dt:.2f}s")
+    print(f"retained with source: {with_source / mib:8.1f} MiB  {with_source / n_steps:6.0f} B/step")
+    print(f"retained IR only:     {ir_only / mib:8.1f} MiB  {ir_only / n_steps:6.0f} B/step")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,47 @@
+"""Scaling of `scanner scan --jobs N` over a synthetic directory of workflows.
+
+    python -m benchmarks.parallel_scan --files 2000
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from scanner.cli import _iter_scan_results
+from scanner.ir.cache import IR_CACHE
+
+from ._corpus import write_corpus
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--files", type=int, default=2000)
+    ap.add_argument("--level", default="L2")
+    args = ap.parse_args()
+
+    # The corpus repeats a few sample texts; measure parsing, not IR cache hits.
+    IR_CACHE.max_bytes = 0
+
+    cpu = os.cpu_count() or 1
+    job_counts = sorted({1, 2, 4, cpu})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = write_corpus(Path(tmp), args.files)
+        print(f"files={len(paths)} level={args.level} cpu={cpu}")
+        print(f"{'jobs':>5} {'seconds':>9} {'files/s':>9} {'speedup':>8}")
+        baseline = None
+        for jobs in job_counts:
+            t0 = time.perf_counter()
+            results = _iter_scan_results(paths, levels=[args.level], policy={}, jobs=jobs)
+            n = sum(len(fs) for by_level, _, _ in results for fs in by_level.values())
+            dt = time.perf_counter() - t0
+            baseline = baseline or dt
+            print(f"{jobs:>5} {dt:>9.3f} {len(paths) / dt:>9.0f} {baseline / dt:>7.2f}x  ({n} findings)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,53 @@
+"""Output size and serialization time: inline `explain` on every finding vs a `rules` catalog.
+
+    python -m benchmarks.rules_catalog --files 500
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from typing import Any, Dict, List
+
+from scanner.engine import scan_workflow_text
+from scanner.findings import Finding, RuleCatalog
+
+from ._corpus import sample_workflows
+
+
+def corpus_findings(n_files: int, level: str) -> List[Finding]:
+    samples = sample_workflows()
+    findings: List[Finding] = []
+    for i in range(n_files):
+        findings.extend(scan_workflow_text(f"wf-{i:05d}.yml", samples[i % len(samples)], level=level))
+    return findings
+
+
+def inline(findings: List[Finding]) -> Dict[str, Any]:
+    return {"findings": [f.to_dict() for f in findings]}
+
+
+def catalog(findings: List[Finding]) -> Dict[str, Any]:
+    cat = RuleCatalog()
+    out = [cat.compact(f.to_dict())[0] for f in findings]
+    return {"rules": cat.rules, "findings": out}
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--files", type=int, default=500)
+    ap.add_argument("--level", default="L2")
+    args = ap.parse_args()
+
+    findings = corpus_findings(args.files, args.level)
+    print(f"findings={len(findings)}")
+    for label, build in (("inline", inline), ("catalog", catalog)):
+        t0 = time.perf_counter()
+        text = json.dumps(build(findings))
+        dt = time.perf_counter() - t0
+        print(f"{label:>8}: {len(text) / 1024:.0f} KiB  {dt * 1000:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
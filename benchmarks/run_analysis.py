@@ -0,0 +1,84 @@
+"""Single-pass `analyze_run` vs the previous per-control regex scanning of run blocks.
+
+    python -m benchmarks.run_analysis --repeat 2000
+"""
+from __future__ import annotations
+
+import argparse
+import re
+import time
+from typing import List
+
+from scanner.ir.parser import parse_workflow_yaml
+from scanner.ir.run_analysis import analyze_run
+
+from ._corpus import sample_workflows
+
+_I_M = re.IGNORECASE | re.MULTILINE
+
+
+def legacy_scan(cmd: str) -> tuple:
+    """What derivation, L1-05, L2-07 and L2-09 used to do per run block (string patterns, no prefilters)."""
+    # derive_workflow
+    az = bool(re.compile(r"\baz\s+(login|account|deployment|keyvault|aks|acr)\b", re.IGNORECASE).search(cmd))
+    secrets = bool(re.compile(r"\$\{\{\s*secrets\.[A-Za-z0-9_]+\s*\}\}").search(cmd))
+    set_x = bool(re.compile(r"(^|\n)\s*set\s+-x\b").search(cmd))
+    curl = bool(re.compile(r"(curl\s+[^\n\r]*\|\s*(bash|sh))|(wget\s+[^\n\r]*\|\s*(bash|sh))", re.IGNORECASE).search(cmd))
+    # L1-05 _scan_run
+    xtrace = bool(re.search(r"(^|\s)set\s+-x(\s|$)|xtrace", cmd, flags=_I_M))
+    env_dump = bool(
+        re.search(r"(^|\s)(printenv|env)(\s|$)", cmd, flags=_I_M)
+        or re.search(r"Get-ChildItem\s+Env:|gci\s+Env:|dir\s+Env:", cmd, flags=_I_M)
+    )
+    echo = bool(
+        re.search(r"\$\{\{\s*secrets\.[^\s\}]+\s*\}\}", cmd)
+        and re.search(r"(^|\s)(echo|printf|Write-Output|Write-Host)\s+", cmd, flags=_I_M)
+    )
+    # L2-07
+    remote = bool(
+        re.search(r"\b(curl|wget)\b[^\n\r]*\|\s*(bash|sh)\b", cmd, flags=_I_M)
+        or re.search(r"\b(bash|sh)\s+-c\s+\"\$\(\s*(curl|wget)\b", cmd, flags=_I_M)
+        or re.search(r"\b(iwr|Invoke-WebRequest)\b[^\n\r]*\|\s*(iex|Invoke-Expression)\b", cmd, flags=_I_M)
+    )
+    # L2-09 _is_azure_job
+    az = az or bool(re.compile(r"\baz\s+(login|account|deployment|keyvault|aks|acr)\b", re.IGNORECASE).search(cmd))
+    return (secrets, set_x, curl, az, xtrace, env_dump, echo, remote)
+
+
+def single_pass(cmd: str) -> tuple:
+    d = analyze_run(cmd)
+    return (d.references_secrets, d.has_set_x, d.has_curl_pipe_shell, d.uses_azure_cli,
+            d.has_xtrace, d.has_env_dump, d.has_secret_echo, d.has_remote_script_exec)
+
+
+def run_commands() -> List[str]:
+    cmds: List[str] = []
+    for i, text in enumerate(sample_workflows()):
+        wf = parse_workflow_yaml(f"wf{i}.yml", text)
+        cmds.extend(s.run.command for j in wf.jobs for s in j.steps if s.run is not None)
+    return cmds
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--repeat", type=int, default=2000)
+    args = ap.parse_args()
+
+    cmds = run_commands()
+    for c in cmds:
+        assert legacy_scan(c) == single_pass(c), c
+
+    print(f"run blocks={len(cmds)} repeat={args.repeat}")
+    for label, fn in (("legacy", legacy_scan), ("single-pass", single_pass)):
+        t0 = time.perf_counter()
+        for _ in range(args.repeat):
+            for c in cmds:
+                fn(c)
+        dt = time.perf_counter() - t0
+        n = len(cmds) * args.repeat
+        print(f"{label:>12}: {dt:.3f}s  {dt / n * 1e6:.2f} us/run-block")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,65 @@
+"""Per-file control evaluation cost: one shared IR walk vs one walk per control, with 7 and 50 controls.
+
+    python -m benchmarks.visitor_engine --repeat 200
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from typing import List
+
+from scanner.controls.base import Control
+from scanner.engine import controls_for_level, policy_for_level, run_controls
+from scanner.ir.derivation import derive_workflow
+from scanner.ir.models import WorkflowIR
+from scanner.ir.parser import parse_workflow_yaml
+from scanner.policy.compiled import CompiledPolicy
+
+from ._corpus import sample_workflows
+
+
+def control_set(n: int) -> List[Control]:
+    """`n` controls made by cycling the L2 set; clones get distinct control ids."""
+    base = controls_for_level("L2")
+    out: List[Control] = []
+    for i in range(n):
+        cls = type(base[i % len(base)])
+        if i >= len(base):
+            cls = type(f"{cls.__name__}_{i}", (cls,), {"control_id": f"{cls.control_id}#{i}"})
+        out.append(cls())
+    return out
+
+
+def per_control_walks(wf: WorkflowIR, controls: List[Control], policy: CompiledPolicy) -> None:
+    for c in controls:
+        c.evaluate(wf, policy)
+
+
+def single_walk(wf: WorkflowIR, controls: List[Control], policy: CompiledPolicy) -> None:
+    run_controls(wf, controls, policy)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--repeat", type=int, default=200)
+    args = ap.parse_args()
+
+    policy = CompiledPolicy.from_dict(policy_for_level("L2"))
+    wfs = [derive_workflow(parse_workflow_yaml(f"wf{i}.yml", t)) for i, t in enumerate(sample_workflows())]
+
+    print(f"workflows={len(wfs)} repeat={args.repeat}")
+    for n in (7, 50):
+        controls = control_set(n)
+        for label, fn in (("per-control", per_control_walks), ("single-walk", single_walk)):
+            t0 = time.perf_counter()
+            for _ in range(args.repeat):
+                for wf in wfs:
+                    fn(wf, controls, policy)
+            dt = time.perf_counter() - t0
+            per_file = dt / (len(wfs) * args.repeat)
+            print(f"{n:>3} controls {label:>12}: {dt:.3f}s  {per_file * 1e6:.1f} us/file")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,50 @@
+"""libyaml (CSafeLoader) vs pure-Python SafeLoader in `parse_workflow_yaml`.
+
+Also checks that both loaders build an identical WorkflowIR for every file under test/.
+
+    python -m benchmarks.yaml_loader --repeat 200
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from pathlib import Path
+
+import yaml
+
+from scanner.ir.derivation import derive_workflow
+from scanner.ir.parser import YAML_LOADER, parse_workflow_yaml
+
+from ._corpus import REPO_ROOT
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--repeat", type=int, default=200)
+    args = ap.parse_args()
+
+    if not hasattr(yaml, "CSafeLoader"):
+        print("PyYAML was built without libyaml; nothing to compare.")
+        return 1
+
+    files = sorted((REPO_ROOT / "test").rglob("*.yml"))
+    texts = [(str(p.relative_to(REPO_ROOT)), p.read_text(encoding="utf-8")) for p in files]
+
+    for name, text in texts:
+        pure = derive_workflow(parse_workflow_yaml(name, text, loader=yaml.SafeLoader))
+        fast = derive_workflow(parse_workflow_yaml(name, text, loader=yaml.CSafeLoader))
+        assert pure == fast, f"loader mismatch for {name}"
+    print(f"parity: {len(texts)} files identical (default loader: {YAML_LOADER})")
+
+    for label, loader in (("SafeLoader", yaml.SafeLoader), ("CSafeLoader", yaml.CSafeLoader)):
+        t0 = time.perf_counter()
+        for _ in range(args.repeat):
+            for name, text in texts:
+                parse_workflow_yaml(name, text, loader=loader)
+        dt = time.perf_counter() - t0
+        print(f"{label:>12}: {dt:.3f}s  {dt / (args.repeat * len(texts)) * 1e3:.3f} ms/file")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+from dataclasses import fields
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from . import __version__
+from .engine import policy_for_level
+from .findings import Finding
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+_FINDING_FIELDS = {f.name for f in fields(Finding)} - {"file_path"}
+
+
+@lru_cache(maxsize=1)
+def code_fingerprint() -> str:
+    """sha256 over the scanner package's own source files.
+
+    `__version__` is not bumped when controls or locations change, so it cannot
+    invalidate cached findings on its own; any edit to the package's code does.
+    """
+    root = Path(__file__).resolve().parent
+    h = hashlib.sha256(__version__.encode("utf-8"))
+    for p in sorted(root.rglob("*.py")):
+        try:
+            data = p.read_bytes()
+        except OSError:
+            continue
+        h.update(p.relative_to(root).as_posix().encode("utf-8"))
+        h.update(b"\0")
+        h.update(hashlib.sha256(data).digest())
+    return h.hexdigest()
+
+
+def default_cache_dir() -> Path:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return Path(base) / "pipeline-scanner"
+
+
+class ScanCache:
+    """On-disk, content-addressed cache of per-file scan results.
+
+    Entries are keyed by sha256 of the workflow text, the level, the merged
+    policy (`policy_for_level`) and `code_fingerprint()`, so any change to one
+    of them, including an upgrade of the scanner itself, is a miss. File paths
+    are not part of the key: identical workflows at different paths share an
+    entry and the path is rewritten on load.
+
+    Writes are atomic (temp file + rename), so worker processes can share a
+    cache directory. Eviction is LRU by mtime and runs in `prune()`.
+    """
+
+    def __init__(self, cache_dir: Path, *, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def key(
+        text: str,
+        level: str,
+        policy: Dict[str, Any] | None,
+        *,
+        controls: Sequence[str] | None = None,
+        skip_controls: Sequence[str] | None = None,
+    ) -> str:
+        h = hashlib.sha256()
+        h.update(hashlib.sha256(text.encode("utf-8")).digest())
+        params: Dict[str, Any] = {
+            "level": (level or "L1").upper(),
+            "policy": policy_for_level(level, policy),
+            "version": code_fingerprint(),
+        }
+        # Only present when narrowed, so full-scan keys are unchanged.
+        if controls:
+            params["controls"] = sorted(controls)
+        if skip_controls:
+            params["skip_controls"] = sorted(skip_controls)
+        h.update(json.dumps(params, sort_keys=True).encode("utf-8"))
+        return h.hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, key: str, file_path: str) -> Optional[List[Finding]]:
+        p = self._entry_path(key)
+        try:
+            raw = json.loads(p.read_text(encoding="utf-8"))
+            findings = [
+                Finding(**{k: v for k, v in d.items() if k in _FINDING_FIELDS}, file_path=file_path)
+                for d in raw
+                if isinstance(d, dict)
+            ]
+        except (OSError, ValueError, TypeError):
+            return None
+        try:
+            os.utime(p)  # mark as recently used for LRU eviction
+        except OSError:
+            pass
+        return findings
+
+    def put(self, key: str, findings: List[Finding]) -> None:
+        p = self._entry_path(key)
+        records = []
+        for f in findings:
+            d = f.to_dict()
+            d.pop("file_path", None)
+            records.append(d)
+        tmp: Optional[str] = None
+        try:
+            p.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=p.parent, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                json.dump(records, fh, separators=(",", ":"))
+            os.replace(tmp, p)
+            tmp = None
+        except (OSError, TypeError, ValueError):
+            # A cache that cannot be written is just a slower scan.
+            pass
+        finally:
+            if tmp is not None:
+                try:
+                    os.unlink(tmp)
+                except OSError:
+                    pass
+
+    def prune(self) -> int:
+        """Evict least recently used entries until the cache fits in max_bytes. Returns entries removed."""
+        entries = []
+        total = 0
+        for p in self.cache_dir.glob("*/*.json"):
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+            total += st.st_size
+
+        removed = 0
+        entries.sort()
+        for _, size, p in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                p.unlink()
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
@@ -2,14 +2,36 @@ from __future__ import annotations
 
 import argparse
 import json
+import os
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack, contextmanager
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, TextIO, Tuple, TypeVar
 
 import yaml
 
-from .engine import scan_workflow_text, LEVELS
-from .utils.sarif import findings_to_sarif
+from . import __version__
+from .cache import DEFAULT_MAX_BYTES, ScanCache, default_cache_dir
+from .controls.base import Control
+from .engine import (
+    LEVELS,
+    controls_for_level,
+    parse_control_patterns,
+    parse_levels,
+    scan_workflow_levels,
+    select_controls,
+)
+from .findings import Finding, RuleCatalog
+from .ir.parser import YAML_LOADER
+from .utils.discovery import Discovery
+from .utils.git import GitError, select_changed_workflows
+from .utils.sarif import DEFAULT_MAX_BYTES as SARIF_MAX_BYTES, DEFAULT_MAX_RESULTS as SARIF_MAX_RESULTS, SarifWriter
+from .policy.compiled import CompiledPolicy
 from .policy.loader import validate_policy, PolicyValidationError
+from .policy.presets import PRESET_NAMES
+from .whatif import FileTally, WhatIfReport, candidate_policies, whatif_text
 
 
 def _load_policy(policy_path: str | None) -> Dict[str, Any]:
@@ -37,10 +59,119 @@ def _load_policy(policy_path: str | None) -> Dict[str, Any]:
         raise ValueError(f"Invalid policy file: {e}") from e
 
 
-def _collect_workflow_paths(base: Path) -> List[Path]:
-    if base.is_file() and base.suffix in {".yml", ".yaml"}:
-        return [base]
-    return list(base.rglob("*.yml")) + list(base.rglob("*.yaml"))
+# Control selection as normalized (controls, skip_controls) patterns.
+Selection = Tuple[Optional[Tuple[str, ...]], Optional[Tuple[str, ...]]]
+ScanTask = Tuple[str, Tuple[str, ...], Dict[str, Any], Optional[str], Selection]
+ScanOutcome = Tuple[Dict[str, List[Finding]], int, int]
+
+
+def _scan_path(task: ScanTask) -> ScanOutcome:
+    """Scan one file at each level. Returns (findings by level, cache hits, cache misses)."""
+    # Top-level so it can be pickled into worker processes.
+    file_path, levels, policy, cache_dir, (only, skip) = task
+    text = Path(file_path).read_text(encoding="utf-8")
+
+    cache = ScanCache(Path(cache_dir)) if cache_dir else None
+    by_level: Dict[str, List[Finding]] = {}
+    keys: Dict[str, str] = {}
+    if cache is not None:
+        for level in levels:
+            keys[level] = ScanCache.key(text, level, policy, controls=only, skip_controls=skip)
+            cached = cache.get(keys[level], file_path)
+            if cached is not None:
+                by_level[level] = cached
+
+    missing = [level for level in levels if level not in by_level]
+    if missing:
+        # One parse+derive for every level not served from the cache.
+        fresh = scan_workflow_levels(
+            file_path, text, {level: policy for level in missing}, controls=only, skip_controls=skip,
+        )
+        by_level.update(fresh)
+        if cache is not None:
+            for level, findings in fresh.items():
+                cache.put(keys[level], findings)
+
+    hits = len(levels) - len(missing) if cache is not None else 0
+    misses = len(missing) if cache is not None else 0
+    return {level: by_level[level] for level in levels}, hits, misses
+
+
+def _iter_scan_results(
+    paths: Sequence[Path],
+    *,
+    levels: Sequence[str],
+    policy: Dict[str, Any],
+    jobs: int,
+    cache_dir: Optional[str] = None,
+    selection: Selection = (None, None),
+) -> Iterator[ScanOutcome]:
+    """Yield per-file `_scan_path` results in the same order as `paths`.
+
+    With jobs > 1 parse+derive+evaluate runs in a process pool; `Executor.map`
+    keeps results in submission order so output stays deterministic.
+    """
+    tasks = [(str(p), tuple(levels), policy, cache_dir, selection) for p in paths]
+    yield from _pool_map(_scan_path, tasks, jobs)
+
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def _pool_map(fn: Callable[[T], R], tasks: Sequence[T], jobs: int) -> Iterator[R]:
+    """`map(fn, tasks)` across up to `jobs` worker processes, results in task order."""
+    workers = min(jobs, len(tasks))
+    if workers <= 1:
+        for t in tasks:
+            yield fn(t)
+        return
+
+    # Batch several files per IPC round trip; small enough to keep workers balanced.
+    chunksize = max(1, len(tasks) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        yield from ex.map(fn, tasks, chunksize=chunksize)
+
+
+WhatIfTask = Tuple[str, Tuple[Control, ...], Dict[str, CompiledPolicy]]
+
+
+def _whatif_path(task: WhatIfTask) -> FileTally:
+    file_path, controls, policies = task
+    text = Path(file_path).read_text(encoding="utf-8")
+    return whatif_text(file_path, text, controls, policies)
+
+
+def _levels_arg(value: str) -> List[str]:
+    try:
+        return parse_levels(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from e
+
+
+def _controls_arg(value: str) -> Optional[Tuple[str, ...]]:
+    patterns = parse_control_patterns(value)
+    try:
+        select_controls([], patterns)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from e
+    return patterns
+
+
+def _positive_int(value: str) -> int:
+    n = int(value)
+    if n < 1:
+        raise argparse.ArgumentTypeError("must be >= 1")
+    return n
+
+
+@contextmanager
+def _output_stream(out_path: str | None) -> Iterator[TextIO]:
+    if out_path:
+        with open(out_path, "w", encoding="utf-8") as fh:
+            yield fh
+    else:
+        yield sys.stdout
 
 
 def _write_output(payload: Dict[str, Any], *, out_path: str | None) -> None:
@@ -51,59 +182,324 @@ def _write_output(payload: Dict[str, Any], *, out_path: str | None) -> None:
         print(text)
 
 
+def _discovery(args: argparse.Namespace) -> Discovery:
+    return Discovery(
+        include=args.include or (),
+        exclude=args.exclude or (),
+        workflows_only=args.workflows_only,
+        use_gitignore=not args.no_ignore,
+    )
+
+
+def _discover(args: argparse.Namespace, base: Path) -> List[Path]:
+    discovery = _discovery(args)
+    paths = discovery.collect(base)
+    if base.is_dir():
+        st = discovery.stats
+        print(
+            f"discovery: {st.files} files, {st.dirs} dirs walked, {st.pruned} pruned in {st.seconds:.2f}s",
+            file=sys.stderr,
+        )
+    return paths
+
+
 def cmd_scan(args: argparse.Namespace) -> int:
     base = Path(args.path)
     policy = _load_policy(args.policy)
 
-    paths = sorted(set(_collect_workflow_paths(base)))
+    if args.changed_since and base.is_dir():
+        # Same --include/--exclude/--workflows-only/.gitignore rules as a full walk.
+        try:
+            changed = select_changed_workflows(base, args.changed_since, committed_only=args.committed_only)
+        except GitError as e:
+            print(f"error: --changed-since: {e}", file=sys.stderr)
+            return 2
+        paths = _discovery(args).select(base, changed)
+    else:
+        paths = _discover(args, base)
+
+    cache: Optional[ScanCache] = None
+    if not args.no_cache:
+        cache = ScanCache(Path(args.cache_dir) if args.cache_dir else default_cache_dir(),
+                          max_bytes=args.cache_max_mb * 1024 * 1024)
 
-    all_findings: List[Dict[str, Any]] = []
-    has_fail = False
+    levels: List[str] = args.level
+    multi = len(levels) > 1
+    all_findings: Dict[str, List[Dict[str, Any]]] = {level: [] for level in levels}
+    status_counts: Dict[str, Counter[str]] = {level: Counter() for level in levels}
+    files = hits = misses = 0
+    catalog = RuleCatalog() if args.rules_catalog else None
 
-    for fp in paths:
-        text = fp.read_text(encoding="utf-8")
-        findings = scan_workflow_text(
-            file_path=str(fp),
-            text=text,
-            policy=policy,
-            level=args.level,
-        )
-        for f in findings:
-            d = f.to_dict()
-            all_findings.append(d)
-            if d["status"] == "FAIL":
-                has_fail = True
+    results = _iter_scan_results(
+        paths,
+        levels=levels,
+        policy=policy,
+        jobs=args.jobs,
+        cache_dir=str(cache.cache_dir) if cache else None,
+        selection=(args.controls, args.skip_controls),
+    )
+    with ExitStack() as stack:
+        # ndjson and sarif stream findings as each file completes instead of buffering the run.
+        stream = stack.enter_context(_output_stream(args.out)) if args.format == "ndjson" else None
+        sarif = None
+        if args.format == "sarif":
+            sarif = stack.enter_context(SarifWriter(
+                args.out,
+                tool_version=__version__,
+                max_results=args.sarif_max_results,
+                max_bytes=args.sarif_max_mb * 1024 * 1024,
+            ))
+
+        for by_level, file_hits, file_misses in results:
+            files += 1
+            hits += file_hits
+            misses += file_misses
+            for level, file_findings in by_level.items():
+                for f in file_findings:
+                    status_counts[level][f.status] += 1
+                    if catalog is not None:
+                        # Explanations go to the catalog without being copied into each record.
+                        d, new_rule = catalog.add(f)
+                        if stream is not None and new_rule is not None:
+                            # Each rule's explanation precedes its first finding.
+                            rule_id = d.get("rule_id") or d["control_id"]
+                            stream.write(json.dumps({"type": "rule", "rule_id": rule_id, **new_rule}) + "\n")
+                    else:
+                        d = f.to_dict()
+                    if stream is not None:
+                        # With several levels each record says which one it belongs to.
+                        stream.write(json.dumps({**d, "level": level} if multi else d) + "\n")
+                    elif sarif is not None:
+                        sarif.add(d)
+                    else:
+                        all_findings[level].append(d)
+            if stream is not None:
+                stream.flush()
+
+        if stream is not None:
+            for level in levels:
+                stream.write(json.dumps({
+                    "type": "summary",
+                    "level": level,
+                    "files": files,
+                    "findings": sum(status_counts[level].values()),
+                    "status_counts": dict(status_counts[level]),
+                }) + "\n")
+            stream.flush()
+
+        if sarif is not None:
+            shards = sarif.close()
+            if len(shards) > 1:
+                print(f"sarif: wrote {len(shards)} files: {', '.join(map(str, shards))}", file=sys.stderr)
+
+    has_fail = any(c["FAIL"] > 0 for c in status_counts.values())
 
     if args.format == "json":
-        payload = {"level": args.level, "findings": all_findings}
+        per_level = [{"level": level, "findings": all_findings[level]} for level in levels]
+        payload = {"results": per_level} if multi else per_level[0]
+        if catalog is not None:
+            payload = {**payload, "rules": catalog.rules}
         _write_output(payload, out_path=args.out)
-    elif args.format == "sarif":
-        payload = findings_to_sarif(all_findings, tool_version="0.1.0")
-        _write_output(payload, out_path=args.out)
-    else:
+    elif args.format not in ("ndjson", "sarif"):  # streamed formats were written while scanning
         raise ValueError(f"Unknown format: {args.format}")
 
+    if cache is not None:
+        evicted = cache.prune()
+        print(f"cache: {hits} hits, {misses} misses, {evicted} evicted ({cache.cache_dir})", file=sys.stderr)
+
     return 2 if has_fail else 0
 
 
+def _policy_candidate(value: str) -> Tuple[str, str]:
+    """NAME=FILE, or FILE named after its stem."""
+    name, sep, path = value.partition("=")
+    if not sep:
+        name, path = Path(value).stem, value
+    if not name or not path:
+        raise argparse.ArgumentTypeError("expected NAME=FILE or FILE")
+    return name, path
+
+
+def cmd_whatif(args: argparse.Namespace) -> int:
+    base = Path(args.path)
+    level = args.level.upper()
+
+    presets = args.preset or ([] if args.policy else list(PRESET_NAMES))
+    custom: Dict[str, Dict[str, Any]] = {}
+    for name, path in args.policy or []:
+        if name in custom:
+            print(f"error: --policy name '{name}' given twice; use NAME=FILE to tell them apart", file=sys.stderr)
+            return 2
+        custom[name] = _load_policy(path)
+    try:
+        policies = candidate_policies(level, presets, custom)
+    except ValueError as e:
+        print(f"error: {e} Use NAME=FILE to rename a policy file.", file=sys.stderr)
+        return 2
+    names = list(policies)
+    if args.baseline and args.baseline not in policies:
+        print(f"error: unknown baseline '{args.baseline}'. Candidates: {names}", file=sys.stderr)
+        return 2
+
+    controls = tuple(controls_for_level(level))
+    report = WhatIfReport(level, names, baseline=args.baseline)
+    tasks = [(str(p), controls, policies) for p in _discover(args, base)]
+    for tally in _pool_map(_whatif_path, tasks, args.jobs):
+        report.add(tally)
+
+    if args.format == "json":
+        _write_output(report.to_dict(), out_path=args.out)
+    else:
+        with _output_stream(args.out) as fh:
+            fh.write(report.format_table() + "\n")
+    return 0
+
+
+def _add_discovery_args(s: argparse.ArgumentParser) -> None:
+    s.add_argument(
+        "--include",
+        action="append",
+        metavar="GLOB",
+        help="Only scan files matching this .gitignore-style glob, relative to PATH (repeatable).",
+    )
+    s.add_argument(
+        "--exclude",
+        action="append",
+        metavar="GLOB",
+        help="Skip files and directories matching this .gitignore-style glob, relative to PATH (repeatable).",
+    )
+    s.add_argument(
+        "--workflows-only",
+        action="store_true",
+        help="Only pick up .github/workflows/*.yml|yaml and action.yml|yaml files.",
+    )
+    s.add_argument("--no-ignore", action="store_true", help="Do not honor .gitignore files during discovery.")
+
+
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(prog="scanner", description="GitHub Actions pipeline security scanner (MVP).")
+    parser.add_argument("--version", action="version", version=f"%(prog)s {__version__} (yaml loader: {YAML_LOADER})")
     sub = parser.add_subparsers(dest="command", required=True)
 
     s = sub.add_parser("scan", help="Scan a workflow file or a directory containing workflows.")
     s.add_argument("path", help="Path to workflow file or directory (e.g. .github/workflows).")
     s.add_argument("--policy", help="Path to policy YAML/JSON file (optional).", default=None)
-    s.add_argument("--level", choices=sorted(LEVELS), default="L1", help="Security level to evaluate (L1/L2/L3).")
-    s.add_argument("--format", choices=["json", "sarif"], default="json", help="Output format.")
+    s.add_argument(
+        "--level",
+        type=_levels_arg,
+        default=["L1"],
+        help="Security level(s) to evaluate: L1, L2, L3, or a comma-separated list such as L1,L2,L3 "
+             "(each file is parsed once for all levels).",
+    )
+    s.add_argument(
+        "--format",
+        choices=["json", "sarif", "ndjson"],
+        default="json",
+        help="Output format. ndjson streams one finding per line, then a summary record.",
+    )
     s.add_argument("--out", default=None, help="Write output to a file instead of stdout.")
+    s.add_argument(
+        "--rules-catalog",
+        action="store_true",
+        help="json/ndjson: store each rule's explanation once in a `rules` catalog keyed by rule_id; "
+             "findings keep only explain fields that differ from it.",
+    )
+    s.add_argument(
+        "--sarif-max-results",
+        type=_positive_int,
+        default=SARIF_MAX_RESULTS,
+        help="With --format sarif --out, start a new SARIF file after this many results (default: %(default)s).",
+    )
+    s.add_argument(
+        "--sarif-max-mb",
+        type=_positive_int,
+        default=SARIF_MAX_BYTES // (1024 * 1024),
+        help="With --format sarif --out, start a new SARIF file before this size is reached (default: %(default)s MB).",
+    )
+    s.add_argument(
+        "--jobs",
+        type=_positive_int,
+        default=os.cpu_count() or 1,
+        help="Number of worker processes for scanning (default: CPU count; 1 disables the pool).",
+    )
+    s.add_argument(
+        "--changed-since",
+        metavar="REF",
+        default=None,
+        help="Only scan workflows changed since the merge-base of REF and HEAD, plus workflows "
+             "that reference them via local `uses: ./...` (requires git).",
+    )
+    s.add_argument(
+        "--committed-only",
+        action="store_true",
+        help="With --changed-since, compare against HEAD instead of the working tree.",
+    )
+    s.add_argument(
+        "--controls",
+        type=_controls_arg,
+        default=None,
+        metavar="IDS",
+        help="Only run these controls: comma-separated IDs or globs, e.g. L1-01,L1-02 or 'L1-*'.",
+    )
+    s.add_argument(
+        "--skip-controls",
+        type=_controls_arg,
+        default=None,
+        metavar="IDS",
+        help="Do not run these controls (IDs or globs, comma-separated).",
+    )
+    _add_discovery_args(s)
+    s.add_argument("--no-cache", action="store_true", help="Disable the on-disk scan result cache.")
+    s.add_argument("--cache-dir", default=None, help=f"Scan result cache directory (default: {default_cache_dir()}).")
+    s.add_argument(
+        "--cache-max-mb",
+        type=_positive_int,
+        default=DEFAULT_MAX_BYTES // (1024 * 1024),
+        help="Evict least recently used cache entries beyond this size (default: %(default)s MB).",
+    )
     s.set_defaults(func=cmd_scan)
 
+    w = sub.add_parser(
+        "whatif",
+        help="Compare FAIL/WARN counts under several policies, parsing each workflow once.",
+    )
+    w.add_argument("path", help="Path to workflow file or directory.")
+    w.add_argument("--level", choices=sorted(LEVELS), default="L1", type=str.upper, help="Security level (L1/L2/L3).")
+    w.add_argument(
+        "--preset",
+        action="append",
+        choices=PRESET_NAMES,
+        help="Preset to compare (repeatable; default: all presets unless --policy is given).",
+    )
+    w.add_argument(
+        "--policy",
+        action="append",
+        type=_policy_candidate,
+        metavar="[NAME=]FILE",
+        help="Candidate policy file (repeatable); named after the file stem unless NAME= is given.",
+    )
+    w.add_argument("--baseline", default=None, help="Candidate the deltas are relative to (default: the first one).")
+    w.add_argument("--format", choices=["table", "json"], default="table", help="Output format.")
+    w.add_argument("--out", default=None, help="Write output to a file instead of stdout.")
+    w.add_argument(
+        "--jobs",
+        type=_positive_int,
+        default=os.cpu_count() or 1,
+        help="Number of worker processes (default: CPU count; 1 disables the pool).",
+    )
+    _add_discovery_args(w)
+    w.set_defaults(func=cmd_whatif)
+
     return parser
 
 
-def main() -> int:
+def main(argv: Optional[Sequence[str]] = None) -> int:
     parser = build_parser()
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
+    if getattr(args, "format", None) == "sarif" and len(args.level) > 1:
+        parser.error("--format sarif takes a single --level")
+    if getattr(args, "format", None) == "sarif" and getattr(args, "rules_catalog", False):
+        parser.error("--rules-catalog applies to json and ndjson; SARIF already stores rule help once")
     return int(args.func(args))
 
 
@@ -1,15 +1,95 @@
 from __future__ import annotations
 
-from abc import ABC, abstractmethod
-from typing import Dict, Any, List
+from abc import ABC
+from typing import Any, Dict, List, Mapping, Optional, Tuple
 
-from ..ir.models import WorkflowIR
+from ..ir.derivation import DERIVATIONS
+from ..ir.index import WorkflowIndex
+from ..ir.models import WorkflowIR, JobIR, StepIR
 from ..findings import Finding
+from ..policy.compiled import CompiledPolicy
+from ..utils.explain import explain_pack
+
+
+class ScanContext:
+    """Per-scan state for one control: the workflow, the policy, findings so far and scratch state."""
+
+    __slots__ = ("wf", "policy", "findings", "state")
+
+    def __init__(self, wf: WorkflowIR, policy: CompiledPolicy) -> None:
+        self.wf = wf
+        self.policy = policy
+        self.findings: List[Finding] = []
+        self.state: Dict[str, Any] = {}
 
 
 class Control(ABC):
+    """A security control. Instances are stateless and reused across scans.
+
+    Controls are visitors: the engine walks the IR once per scan and calls the
+    hooks a control overrides. Per-scan state lives on the ScanContext, never
+    on the control.
+
+      on_workflow(ctx)            once, before any job
+      on_step(ctx, job, step)     for every step
+      on_job(ctx, job)            after all of the job's steps were visited
+      finalize(ctx) -> findings   once, after the walk
+    """
+
     control_id: str
 
-    @abstractmethod
-    def evaluate(self, wf: WorkflowIR, policy: Dict[str, Any]) -> List[Finding]:
-        raise NotImplementedError
+    # CompiledPolicy fields the control reads. Results are reused across policies that
+    # agree on these; None means "any field" and disables that reuse.
+    policy_fields: Optional[Tuple[str, ...]] = None
+
+    # Derivation passes (ir.derivation.DERIVATIONS) whose fields the control reads; when
+    # only some controls run, passes none of them need are skipped.
+    derivations: Tuple[str, ...] = DERIVATIONS
+
+    def on_workflow(self, ctx: ScanContext) -> None:
+        pass
+
+    def on_step(self, ctx: ScanContext, job: JobIR, step: StepIR) -> None:
+        pass
+
+    def on_job(self, ctx: ScanContext, job: JobIR) -> None:
+        pass
+
+    def finalize(self, ctx: ScanContext) -> List[Finding]:
+        return ctx.findings
+
+    def applies_to(self, index: WorkflowIndex) -> bool:
+        """Applicability predicate. When False the engine emits `skip_finding` without visiting the control."""
+        return True
+
+    def skip_finding(self, wf: WorkflowIR) -> Finding:
+        """SKIP finding for a workflow `applies_to` rejected. Controls override it to say why."""
+        return Finding(
+            control_id=self.control_id,
+            status="SKIP",
+            severity="None",
+            rule_id=f"{self.control_id}.R0",
+            message=f"{self.control_id} does not apply to this workflow.",
+            file_path=wf.file_path,
+            start_line=wf.location.start_line if wf.location else None,
+            end_line=None,
+            explain=explain_pack(
+                why="This control only applies to workflows with specific triggers or steps.",
+                detect="None of them were found.",
+                fix="No change required.",
+                verify="N/A",
+                difficulty="Easy",
+            ),
+        )
+
+    def evaluate(self, wf: WorkflowIR, policy: CompiledPolicy | Mapping[str, Any] | None) -> List[Finding]:
+        """Evaluate this control on its own (one walk of the IR).
+
+        `policy` may also be a plain (merged) policy dict, as before CompiledPolicy
+        existed; it is compiled on entry.
+        """
+        from ..engine import run_controls  # engine imports the controls package
+
+        if not isinstance(policy, CompiledPolicy):
+            policy = CompiledPolicy.from_dict(policy)
+        return run_controls(wf, [self], policy)
@@ -1,10 +1,21 @@
 from __future__ import annotations
 
-from typing import Dict, Any, List
-
-from .ir.parser import parse_workflow_yaml
-from .ir.derivation import derive_workflow
+import fnmatch
+import json
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Any, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple, Union
+
+from .ir.cache import IR_CACHE
+from .ir.derivation import DERIVATIONS
+from .ir.index import build_index
 from .findings import Finding
+from .ir.models import WorkflowIR
+from .controls.base import Control, ScanContext
+from .policy.compiled import CompiledPolicy
+from .policy.presets import get_preset_policy
 
 from .controls.l1_01_action_pin import L101ActionPin
 from .controls.l1_02_permissions import L102Permissions
@@ -17,6 +28,17 @@ from .controls.l2_07_no_curl_bash import L207NoCurlBash
 
 LEVELS = {"L1", "L2", "L3"}
 
+# A path to read, or an already loaded (path, text) pair.
+ScanInput = Union[str, "os.PathLike[str]", Tuple[str, str]]
+
+
+@dataclass
+class ScanResult:
+    """Findings for one scanned file."""
+
+    file_path: str
+    findings: List[Finding]
+
 
 DEFAULT_POLICY_BY_LEVEL: Dict[str, Dict[str, Any]] = {
     "L1": {
@@ -114,6 +136,62 @@ def controls_for_level(level: str) -> List[Any]:
     return l1 + l2
 
 
+def parse_control_patterns(value: str | Sequence[str] | None) -> Optional[Tuple[str, ...]]:
+    """Normalize "L1-01,L1-0*" or ["l1-01"] to upper-case ID/glob patterns; None when empty."""
+    if value is None:
+        return None
+    parts = value.split(",") if isinstance(value, str) else list(value)
+    patterns = tuple(dict.fromkeys(str(p).strip().upper() for p in parts if str(p).strip()))
+    return patterns or None
+
+
+def select_controls(
+    controls: Sequence[Control],
+    only: Sequence[str] | None = None,
+    skip: Sequence[str] | None = None,
+) -> List[Control]:
+    """Keep controls whose ID matches an `only` pattern (all if None) and no `skip` pattern.
+
+    Patterns are control IDs or fnmatch globs (`L1-*`), matched case-insensitively.
+    A pattern that matches no known control at any level is rejected as a likely typo.
+    """
+    known = [c.control_id for c in controls_for_level("L3")]
+    for pat in [*(only or ()), *(skip or ())]:
+        if not fnmatch.filter(known, pat.upper()):
+            raise ValueError(f"Unknown control '{pat}'. Known controls: {known}")
+
+    def matches(control: Control, patterns: Sequence[str]) -> bool:
+        return any(fnmatch.fnmatchcase(control.control_id, p.upper()) for p in patterns)
+
+    return [
+        c for c in controls
+        if (only is None or matches(c, only)) and not (skip and matches(c, skip))
+    ]
+
+
+def derivations_for(controls: Sequence[Control]) -> Tuple[str, ...]:
+    """Derivation passes needed by at least one of `controls`, in DERIVATIONS order."""
+    needed = {d for c in controls for d in c.derivations}
+    return tuple(d for d in DERIVATIONS if d in needed)
+
+
+def parse_levels(value: str | Sequence[str]) -> List[str]:
+    """Normalize "L1,L3" or ["l1", "L3"] to upper-case levels, deduplicated, in the given order."""
+    parts = value.split(",") if isinstance(value, str) else list(value)
+    levels: List[str] = []
+    for p in parts:
+        lvl = str(p).strip().upper()
+        if not lvl:
+            continue
+        if lvl not in LEVELS:
+            raise ValueError(f"Unknown level: {p}. Expected one of: {sorted(LEVELS)}")
+        if lvl not in levels:
+            levels.append(lvl)
+    if not levels:
+        raise ValueError(f"No level given. Expected one or more of: {sorted(LEVELS)}")
+    return levels
+
+
 def policy_for_level(level: str, override: Dict[str, Any] | None = None) -> Dict[str, Any]:
     lvl = (level or "L1").upper()
     if lvl not in LEVELS:
@@ -125,22 +203,220 @@ def policy_for_level(level: str, override: Dict[str, Any] | None = None) -> Dict
     return pol
 
 
+def _overrides(control: Control, hook: str) -> bool:
+    return getattr(type(control), hook) is not getattr(Control, hook)
+
+
+def run_controls(wf: WorkflowIR, controls: Sequence[Control], policy: CompiledPolicy) -> List[Finding]:
+    """Evaluate `controls` against a derived workflow in a single walk of the IR.
+
+    Inapplicable controls (per the workflow index) get their standard SKIP
+    finding and are not visited. Only hooks a control actually overrides are
+    dispatched, so adding controls costs little per step. Findings are
+    returned grouped by control, in `controls` order.
+    """
+    index = build_index(wf)
+
+    per_control: List[List[Finding]] = [[] for _ in controls]
+    active: List[Tuple[int, Control, ScanContext]] = []
+    for i, c in enumerate(controls):
+        if c.applies_to(index):
+            active.append((i, c, ScanContext(wf, policy)))
+        else:
+            # Trigger / step kind / Azure marker missing: standard SKIP without running the control.
+            per_control[i] = [c.skip_finding(wf)]
+
+    wf_hooks = [(c.on_workflow, ctx) for _, c, ctx in active if _overrides(c, "on_workflow")]
+    step_hooks = [(c.on_step, ctx) for _, c, ctx in active if _overrides(c, "on_step")]
+    job_hooks = [(c.on_job, ctx) for _, c, ctx in active if _overrides(c, "on_job")]
+
+    for hook, ctx in wf_hooks:
+        hook(ctx)
+    for job in wf.jobs:
+        if step_hooks:
+            for step in job.steps:
+                for hook, ctx in step_hooks:
+                    hook(ctx, job, step)
+        for hook, ctx in job_hooks:
+            hook(ctx, job)
+
+    for i, c, ctx in active:
+        per_control[i] = c.finalize(ctx)
+
+    findings: List[Finding] = []
+    for fs in per_control:
+        findings.extend(fs)
+    return findings
+
+
+class Scanner:
+    """Long-lived scanner with level, preset and policy resolved once.
+
+    The merged policy is compiled into an immutable CompiledPolicy and the
+    control instances for the level are created up front, so repeated
+    `scan()` calls only parse, derive and evaluate.
+
+    `controls` / `skip_controls` narrow the level's controls by ID or glob;
+    derivation passes that no remaining control reads are skipped.
+    """
+
+    def __init__(
+        self,
+        level: str = "L1",
+        policy: Dict[str, Any] | None = None,
+        *,
+        preset: Optional[str] = None,
+        controls: Sequence[str] | None = None,
+        skip_controls: Sequence[str] | None = None,
+    ) -> None:
+        lvl = (level or "L1").upper()
+        override: Dict[str, Any] = {}
+        if preset:
+            # Preset overrides first; explicit policy keys win.
+            override.update(get_preset_policy(lvl, preset))
+        if policy:
+            override.update(policy)
+
+        self.level = lvl
+        self.policy: CompiledPolicy = CompiledPolicy.from_dict(policy_for_level(lvl, override))
+        self.controls: Tuple[Any, ...] = tuple(select_controls(controls_for_level(lvl), controls, skip_controls))
+        self.derivations = derivations_for(self.controls)
+
+    def scan(self, text: str, file_path: str = "workflow.yml") -> List[Finding]:
+        wf = IR_CACHE.load(file_path, text, self.derivations)
+        return run_controls(wf, self.controls, self.policy)
+
+    def iter_scan(self, items: Iterable[ScanInput]) -> Iterator[ScanResult]:
+        """Lazily scan `items`, yielding one ScanResult per file in input order.
+
+        Paths are read only when reached. Nothing of a file but its findings
+        outlives its iteration, so memory stays flat however many files the
+        iterable produces.
+        """
+        for item in items:
+            if isinstance(item, tuple):
+                file_path, text = item
+            else:
+                file_path = os.fspath(item)
+                text = Path(file_path).read_text(encoding="utf-8")
+            findings = self.scan(text, file_path)
+            # The suspended generator frame would otherwise pin the source until the next file.
+            del item, text
+            yield ScanResult(file_path=file_path, findings=findings)
+
+
+def run_levels(wf: WorkflowIR, scanners: Sequence[Scanner]) -> Dict[str, List[Finding]]:
+    """Evaluate several level scanners against one derived workflow, keyed by level.
+
+    Scanners whose compiled policies are equal share one run of the union of
+    their controls; each level then keeps the findings of its own controls.
+    """
+    groups: Dict[CompiledPolicy, List[Scanner]] = {}
+    for s in scanners:
+        groups.setdefault(s.policy, []).append(s)
+
+    by_level: Dict[str, List[Finding]] = {}
+    for policy, members in groups.items():
+        union: Dict[str, Control] = {}
+        for s in members:
+            for c in s.controls:
+                union.setdefault(c.control_id, c)
+        findings = run_controls(wf, list(union.values()), policy)
+        for s in members:
+            ids = {c.control_id for c in s.controls}
+            by_level[s.level] = [f for f in findings if f.control_id in ids]
+    return {s.level: by_level[s.level] for s in scanners}
+
+
+def _policy_key(control: Control, policy: CompiledPolicy) -> Tuple[Any, ...]:
+    if control.policy_fields is None:
+        return (control.control_id, policy)
+    return (control.control_id, *(getattr(policy, f) for f in control.policy_fields))
+
+
+def run_policies(
+    wf: WorkflowIR,
+    controls: Sequence[Control],
+    policies: Mapping[str, CompiledPolicy],
+) -> Dict[str, List[Finding]]:
+    """Evaluate `controls` under each named policy against one derived workflow.
+
+    A control is run once per distinct combination of the policy fields it
+    declares (`Control.policy_fields`); policies that agree on them share the
+    findings instead of re-evaluating.
+    """
+    memo: Dict[Tuple[Any, ...], List[Finding]] = {}
+    out: Dict[str, List[Finding]] = {}
+    for name, policy in policies.items():
+        keys = [_policy_key(c, policy) for c in controls]
+        pending = [c for c, k in zip(controls, keys) if k not in memo]
+        if pending:
+            fresh = run_controls(wf, pending, policy)
+            for c in pending:
+                memo[_policy_key(c, policy)] = [f for f in fresh if f.control_id == c.control_id]
+        findings: List[Finding] = []
+        for k in keys:
+            findings.extend(memo[k])
+        out[name] = findings
+    return out
+
+
+@lru_cache(maxsize=64)
+def _scanner_for(
+    level: str,
+    policy_key: str,
+    controls: Optional[Tuple[str, ...]] = None,
+    skip_controls: Optional[Tuple[str, ...]] = None,
+) -> Scanner:
+    return Scanner(level, json.loads(policy_key), controls=controls, skip_controls=skip_controls)
+
+
 def scan_workflow_text(
     file_path: str,
     text: str,
     policy: Dict[str, Any] | None = None,
     *,
     level: str = "L1",
+    controls: Sequence[str] | None = None,
+    skip_controls: Sequence[str] | None = None,
 ) -> List[Finding]:
-    pol = policy_for_level(level, policy)
+    """Scan one workflow. Thin wrapper over a Scanner reused per (level, policy, control selection)."""
+    scanner = _scanner_for(
+        (level or "L1").upper(),
+        json.dumps(policy or {}, sort_keys=True),
+        parse_control_patterns(controls),
+        parse_control_patterns(skip_controls),
+    )
+    return scanner.scan(text, file_path)
 
-    wf = parse_workflow_yaml(file_path=file_path, text=text)
-    wf = derive_workflow(wf)
 
-    controls = controls_for_level(level)
+def scan_workflow_levels(
+    file_path: str,
+    text: str,
+    policies: Mapping[str, Dict[str, Any] | None],
+    *,
+    controls: Sequence[str] | None = None,
+    skip_controls: Sequence[str] | None = None,
+) -> Dict[str, List[Finding]]:
+    """Scan one workflow at several levels, parsing and deriving it once.
+
+    `policies` maps each level to its policy override (as for `scan_workflow_text`).
+    """
+    only, skip = parse_control_patterns(controls), parse_control_patterns(skip_controls)
+    scanners = [
+        _scanner_for(lvl.upper(), json.dumps(policy or {}, sort_keys=True), only, skip)
+        for lvl, policy in policies.items()
+    ]
+    wf = IR_CACHE.load(file_path, text, derivations_for([c for s in scanners for c in s.controls]))
+    return run_levels(wf, scanners)
 
-    findings: List[Finding] = []
-    for c in controls:
-        findings.extend(c.evaluate(wf, pol))
 
-    return findings
+def iter_scan(
+    items: Iterable[ScanInput],
+    policy: Dict[str, Any] | None = None,
+    *,
+    level: str = "L1",
+) -> Iterator[ScanResult]:
+    """Generator counterpart of `scan_workflow_text` over paths or (path, text) pairs."""
+    scanner = _scanner_for((level or "L1").upper(), json.dumps(policy or {}, sort_keys=True))
+    return scanner.iter_scan(items)
@@ -1,13 +1,13 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Optional, Dict, Any, Literal
+from typing import Optional, Dict, Any, Literal, Tuple
 
 Status = Literal["PASS", "WARN", "FAIL", "SKIP"]
 Severity = Literal["None", "Low", "Medium", "High", "Critical"]
 
 
-@dataclass
+@dataclass(slots=True)
 class Finding:
     control_id: str
     status: Status
@@ -20,7 +20,7 @@ class Finding:
     explain: Optional[Dict[str, Any]] = None
     metadata: Optional[Dict[str, Any]] = None
 
-    def to_dict(self) -> Dict[str, Any]:
+    def to_dict(self, *, include_explain: bool = True) -> Dict[str, Any]:
         out = {
             "control_id": self.control_id,
             "status": self.status,
@@ -33,4 +33,42 @@ class Finding:
             "explain": self.explain or {},
             "metadata": self.metadata or {},
         }
+        if not include_explain:
+            del out["explain"]
         return out
+
+
+class RuleCatalog:
+    """Explanations stored once per rule_id instead of on every finding.
+
+    `add()` turns a Finding into its compact dict without ever copying `explain`
+    into it; `compact()` strips an existing finding dict's `explain` in place. The
+    first finding of a rule seeds the catalog entry; later findings keep only the
+    explain fields whose text differs from it (e.g. a `detect` naming the job's
+    environment).
+    """
+
+    __slots__ = ("rules",)
+
+    def __init__(self) -> None:
+        self.rules: Dict[str, Dict[str, Any]] = {}
+
+    def add(self, finding: Finding) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+        """Returns (compact finding dict, new catalog entry or None if the rule was already known)."""
+        return self._attach(finding.to_dict(include_explain=False), finding.explain or {})
+
+    def compact(self, d: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+        """Returns (d, new catalog entry or None if the rule was already known)."""
+        return self._attach(d, d.pop("explain", None) or {})
+
+    def _attach(self, d: Dict[str, Any], explain: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+        rule_id = d.get("rule_id") or d["control_id"]
+        entry = self.rules.get(rule_id)
+        if entry is None:
+            entry = self.rules[rule_id] = {"control_id": d["control_id"], "explain": explain}
+            return d, entry
+        base = entry["explain"]
+        diff = {k: v for k, v in explain.items() if base.get(k) != v}
+        if diff:
+            d["explain"] = diff
+        return d, None
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+import warnings
+from collections import OrderedDict
+from typing import Any, Collection, Dict, Optional, Tuple
+
+from .codec import decode_workflow, encode_workflow
+from .derivation import DERIVATIONS, derive_workflow
+from .models import WorkflowIR
+from .parser import parse_workflow_yaml
+
+# Long-running processes (the web app) turn the cache on; a one-shot CLI scan never
+# re-reads a text, so there it would only cost an encode per file.
+WEB_DEFAULT_MB = 64.0
+
+
+def max_bytes_from_env(default_mb: float) -> int:
+    """`SCANNER_IR_CACHE_MB` in bytes, or `default_mb` when unset or not a non-negative number."""
+    raw = os.environ.get("SCANNER_IR_CACHE_MB")
+    if raw is None or not raw.strip():
+        mb = default_mb
+    else:
+        try:
+            mb = float(raw)
+        except ValueError:
+            mb = -1.0
+        if not mb >= 0:  # also rejects nan
+            warnings.warn(f"ignoring invalid SCANNER_IR_CACHE_MB={raw!r}; using {default_mb:g}", stacklevel=2)
+            mb = default_mb
+    return int(mb * 1024 * 1024)
+
+
+# Key digest, tuple and OrderedDict slot, roughly.
+_ENTRY_OVERHEAD = 200
+
+
+class IRCache:
+    """Bounded in-process LRU of parsed and derived workflows, keyed by sha256 of the text.
+
+    Entries are stored as `scanner.ir.codec` bytes and decoded on every hit, so each caller
+    gets its own IR and no control can alter what later scans see. Entries are also keyed
+    by the derivation passes that were run; the file path is not part of the key, since
+    the decoded IR is relocated to the caller's path. Memory is accounted as encoded size;
+    least recently used entries are evicted past `max_bytes`. `max_bytes=0` disables it.
+    """
+
+    def __init__(self, max_bytes: int = 0) -> None:
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Tuple[bytes, Tuple[str, ...]], bytes] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def load(self, file_path: str, text: str, parts: Optional[Collection[str]] = None) -> WorkflowIR:
+        """`derive_workflow(parse_workflow_yaml(file_path, text), parts)`, served from the cache when possible."""
+        if self.max_bytes <= 0:
+            return derive_workflow(parse_workflow_yaml(file_path=file_path, text=text), parts)
+
+        key = (hashlib.sha256(text.encode("utf-8")).digest(), tuple(p for p in DERIVATIONS if parts is None or p in parts))
+        with self._lock:
+            blob = self._entries.get(key)
+            if blob is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+        if blob is not None:
+            return decode_workflow(blob, file_path=file_path)
+
+        wf = derive_workflow(parse_workflow_yaml(file_path=file_path, text=text), parts)
+        try:
+            blob = encode_workflow(wf)
+        except ValueError:
+            # IR the codec cannot store is scanned, just not cached.
+            return wf
+        self._put(key, blob)
+        return wf
+
+    def _put(self, key: Tuple[bytes, Tuple[str, ...]], blob: bytes) -> None:
+        size = len(blob) + _ENTRY_OVERHEAD
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= len(old) + _ENTRY_OVERHEAD
+            self._entries[key] = blob
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= len(evicted) + _ENTRY_OVERHEAD
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+
+# Shared by every Scanner in the process. Off unless SCANNER_IR_CACHE_MB is set;
+# `web.app.create_app` enables it with WEB_DEFAULT_MB.
+IR_CACHE = IRCache(max_bytes_from_env(0))
@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import marshal
+from array import array
+from dataclasses import fields
+from functools import lru_cache
+from typing import Any, FrozenSet, Optional, Tuple
+
+from .models import (
+    NO_STEP_FLAGS, JobDerivedIR, JobIR, LocationIR, PermissionsIR, RunIR, StepDerivedIR, StepIR,
+    TriggerIR, UsesRefIR, WorkflowDerivedIR, WorkflowIR,
+)
+from ..utils.locator import SourceIndex
+
+# Binary encoding of a parsed (and usually derived) WorkflowIR.
+#
+#   MAGIC | version byte | marshal(nested tuples)
+#
+# Each IR object becomes a tuple of its fields in a fixed order (see the _enc_* helpers);
+# dicts, sets and frozensets are marshalled as-is. Locations in the workflow's own file
+# are stored as (start_line, end_line). The source index is stored as its packed
+# line-start table, so decoding does not rescan the text. Bump CODEC_VERSION whenever
+# the layout or the models change; decoding any other version raises ValueError, so
+# cached blobs are simply re-parsed.
+#
+# marshal (not pickle) keeps both directions in C and never executes code on load. Its
+# own format is tied to the Python version, which is part of every cache key anyway.
+
+MAGIC = b"WFIR"
+CODEC_VERSION = 1
+_HEADER = MAGIC + bytes([CODEC_VERSION])
+_MARSHAL_VERSION = 4
+_LINE_TYPECODE = "I"  # source offsets, 4 bytes each
+
+_STEP_FLAG_NAMES = tuple(f.name for f in fields(StepDerivedIR))
+
+
+def _plain(value: Any) -> Any:
+    # Trigger `raw` is the YAML data under `on:`; scalars marshal cannot store
+    # (timestamps) are kept as strings.
+    if value is None or isinstance(value, (str, bool, int, float, bytes)):
+        return value
+    if isinstance(value, dict):
+        return {_plain(k): _plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_plain(v) for v in value]
+    return str(value)
+
+
+# --- encode -----------------------------------------------------------------
+
+
+def _enc_loc(loc: Optional[LocationIR], file_path: str) -> Any:
+    if loc is None:
+        return None
+    if loc.file_path == file_path:
+        return (loc.start_line, loc.end_line)
+    return (loc.start_line, loc.end_line, loc.file_path)
+
+
+def _enc_perm(p: PermissionsIR, fp: str) -> Tuple[Any, ...]:
+    return (p.mode, p.entries, _enc_loc(p.location, fp))
+
+
+def _enc_step(s: StepIR, fp: str) -> Tuple[Any, ...]:
+    u = s.uses
+    r = s.run
+    d = s.derived
+    flags = 0
+    if d is not NO_STEP_FLAGS:
+        for bit, name in enumerate(_STEP_FLAG_NAMES):
+            if getattr(d, name):
+                flags |= 1 << bit
+    return (
+        s.index,
+        s.name,
+        s.kind,
+        None if u is None else (u.full, u.owner_repo, u.ref, u.ref_type),
+        None if r is None else (r.shell, r.command, _enc_loc(r.location, fp), r.span),
+        s.env_keys,
+        s.with_keys,
+        flags,
+        _enc_loc(s.location, fp),
+    )
+
+
+def _enc_job(j: JobIR, fp: str) -> Tuple[Any, ...]:
+    d = j.derived
+    return (
+        j.job_id,
+        j.name,
+        j.runs_on,
+        _enc_perm(j.permissions, fp),
+        j.environment,
+        tuple(_enc_step(s, fp) for s in j.steps),
+        (d.uses_secrets, d.uses_oidc, d.uses_self_hosted, d.dangerous_patterns,
+         d.effective_permissions, d.effective_permissions_mode),
+        _enc_loc(j.location, fp),
+    )
+
+
+def _enc_lines(wf: WorkflowIR) -> Optional[bytes]:
+    idx = wf.source_index
+    if idx is None:
+        return None
+    return array(_LINE_TYPECODE, idx.line_starts).tobytes()
+
+
+def encode_workflow(wf: WorkflowIR, *, include_source: bool = True) -> bytes:
+    """Serialize `wf`, including derived fields and locations, to CODEC_VERSION bytes.
+
+    With `include_source=False` the source text is dropped; decoded IR then has no
+    `source_index`, and findings inside `run:` blocks fall back to the block's first line.
+    """
+    fp = wf.file_path
+    t = wf.triggers
+    d = wf.derived
+    body = (
+        fp,
+        wf.name,
+        (t.events, _plain(t.raw), _enc_loc(t.location, fp),
+         {k: _enc_loc(v, fp) for k, v in t.event_locations.items()}),
+        _enc_perm(wf.permissions, fp),
+        tuple(_enc_job(j, fp) for j in wf.jobs),
+        (d.has_pull_request_target, d.has_pull_request, d.has_fork_risk_surface, d.effective_permissions_mode),
+        wf.source_text if include_source else None,
+        _enc_lines(wf) if include_source else None,
+        _enc_loc(wf.location, fp),
+    )
+    return _HEADER + marshal.dumps(body, _MARSHAL_VERSION)
+
+
+# --- decode -----------------------------------------------------------------
+
+
+@lru_cache(maxsize=4096)
+def _uses(full: str, owner_repo: Optional[str], ref: Optional[str], ref_type: str) -> UsesRefIR:
+    return UsesRefIR(full, owner_repo, ref, ref_type)
+
+
+@lru_cache(maxsize=None)
+def _step_flags(bits: int) -> StepDerivedIR:
+    if not bits:
+        return NO_STEP_FLAGS
+    return StepDerivedIR(*(bool(bits >> i & 1) for i in range(len(_STEP_FLAG_NAMES))))
+
+
+@lru_cache(maxsize=4096)
+def _keys(keys: FrozenSet[str]) -> FrozenSet[str]:
+    # Equal key sets decode to one shared frozenset, as they do when parsed.
+    return keys
+
+
+def _dec_loc(raw: Any, file_path: str) -> Optional[LocationIR]:
+    if raw is None:
+        return None
+    if len(raw) == 2:
+        return LocationIR(file_path, raw[0], raw[1])
+    return LocationIR(raw[2], raw[0], raw[1])
+
+
+def _dec_perm(raw: Tuple[Any, ...], fp: str) -> PermissionsIR:
+    mode, entries, loc = raw
+    return PermissionsIR(mode, entries, _dec_loc(loc, fp))
+
+
+def _dec_step(raw: Tuple[Any, ...], fp: str) -> StepIR:
+    index, name, kind, uses, run, env_keys, with_keys, flags, loc = raw
+    return StepIR(
+        index,
+        name,
+        kind,
+        None if uses is None else _uses(*uses),
+        None if run is None else RunIR(run[0], run[1], _dec_loc(run[2], fp), run[3]),
+        _keys(env_keys),
+        _keys(with_keys),
+        _step_flags(flags),
+        _dec_loc(loc, fp),
+    )
+
+
+def _dec_job(raw: Tuple[Any, ...], fp: str) -> JobIR:
+    job_id, name, runs_on, perm, environment, steps, derived, loc = raw
+    return JobIR(
+        job_id,
+        name,
+        runs_on,
+        _dec_perm(perm, fp),
+        environment,
+        [_dec_step(s, fp) for s in steps],
+        JobDerivedIR(*derived),
+        _dec_loc(loc, fp),
+    )
+
+
+def _dec_index(text: Optional[str], lines: Optional[bytes]) -> Optional[SourceIndex]:
+    if text is None:
+        return None
+    if lines is None:
+        return SourceIndex(text)
+    starts = array(_LINE_TYPECODE)
+    starts.frombytes(lines)
+    return SourceIndex(text, starts)
+
+
+def decode_workflow(data: bytes, *, file_path: Optional[str] = None) -> WorkflowIR:
+    """Rebuild a WorkflowIR from `encode_workflow` output. Raises ValueError for foreign or stale data.
+
+    `file_path` relocates the IR: it replaces the encoded path on the workflow and on
+    every location in the workflow's own file.
+    """
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError("not an encoded WorkflowIR")
+    if data[len(MAGIC):len(_HEADER)] != _HEADER[len(MAGIC):]:
+        raise ValueError(f"unsupported WorkflowIR codec version {data[len(MAGIC)] if len(data) > len(MAGIC) else None}")
+    try:
+        fp, name, trig, perm, jobs, derived, source_text, lines, loc = marshal.loads(memoryview(data)[len(_HEADER):])
+    except (EOFError, TypeError, ValueError) as e:
+        raise ValueError(f"corrupt WorkflowIR data: {e}") from None
+    if file_path is not None:
+        fp = file_path
+
+    events, trig_raw, trig_loc, event_locs = trig
+    return WorkflowIR(
+        fp,
+        name,
+        TriggerIR(events, trig_raw, _dec_loc(trig_loc, fp), {k: _dec_loc(v, fp) for k, v in event_locs.items()}),
+        _dec_perm(perm, fp),
+        [_dec_job(j, fp) for j in jobs],
+        WorkflowDerivedIR(*derived),
+        source_text,
+        _dec_index(source_text, lines),
+        _dec_loc(loc, fp),
+    )
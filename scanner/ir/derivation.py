@@ -1,16 +1,16 @@
 from __future__ import annotations
 
-import re
-from typing import Dict, Tuple, Iterable
-from .models import WorkflowIR, PermissionsIR
-
-_SECRETS_RE = re.compile(r"\$\{\{\s*secrets\.[A-Za-z0-9_]+\s*\}\}")
-_SET_X_RE = re.compile(r"(^|\n)\s*set\s+-x\b")
-_CURL_PIPE_RE = re.compile(r"(curl\s+[^\n\r]*\|\s*(bash|sh))|(wget\s+[^\n\r]*\|\s*(bash|sh))", re.IGNORECASE)
+from typing import Collection, Dict, Optional, Tuple
+from .models import JobIR, WorkflowIR, PermissionsIR
+from .run_analysis import analyze_run
 
 AZURE_ENV_KEYS = {"AZURE_CREDENTIALS", "AZURE_CLIENT_SECRET", "AZURE_SECRET"}
 AZURE_WITH_KEYS_SECRET = {"creds", "client-secret", "client_secret", "password", "secret"}
-AZ_CLI_RE = re.compile(r"\baz\s+(login|account|deployment|keyvault|aks|acr)\b", re.IGNORECASE)
+
+# Independently skippable derivation passes:
+#   permissions  effective job permissions (merge of workflow + job blocks)
+#   steps        run-block analysis and job-level secret / Azure / dangerous-pattern flags
+DERIVATIONS: Tuple[str, ...] = ("permissions", "steps")
 
 
 def merge_permissions(workflow_perm: PermissionsIR, job_perm: PermissionsIR) -> Tuple[Dict[str, str], str]:
@@ -37,7 +37,15 @@ def merge_permissions(workflow_perm: PermissionsIR, job_perm: PermissionsIR) ->
     return merged, "explicit"
 
 
-def derive_workflow(wf: WorkflowIR) -> WorkflowIR:
+def derive_workflow(wf: WorkflowIR, parts: Optional[Collection[str]] = None) -> WorkflowIR:
+    """Fill the derived fields of `wf` in place.
+
+    `parts` limits the work to a subset of DERIVATIONS (default: all of them);
+    fields of skipped passes keep their model defaults.
+    """
+    do_permissions = parts is None or "permissions" in parts
+    do_steps = parts is None or "steps" in parts
+
     # workflow derived flags
     wf.derived.has_pull_request_target = "pull_request_target" in wf.triggers.events
     wf.derived.has_pull_request = "pull_request" in wf.triggers.events
@@ -46,62 +54,66 @@ def derive_workflow(wf: WorkflowIR) -> WorkflowIR:
 
     # per-job derivation
     for job in wf.jobs:
-        eff, eff_mode = merge_permissions(wf.permissions, job.permissions)
-        job.derived.effective_permissions = eff
-        job.derived.effective_permissions_mode = eff_mode
+        if do_permissions:
+            eff, eff_mode = merge_permissions(wf.permissions, job.permissions)
+            job.derived.effective_permissions = eff
+            job.derived.effective_permissions_mode = eff_mode
 
         # runner classification
         job.derived.uses_self_hosted = any(x == "self-hosted" for x in job.runs_on)
 
-        # step-level analysis
-        uses_secrets = False
-        dangerous = set()
-        uses_azure_login = False
-        azure_env_injected = False
-        azure_with_secret = False
-        uses_azure_cli = False
-
-        for step in job.steps:
-            if step.kind == "run" and step.run is not None:
-                cmd = step.run.command or ""
-                if AZ_CLI_RE.search(cmd):
-                    uses_azure_cli = True
-                if _SECRETS_RE.search(cmd):
-                    uses_secrets = True
-                    step.derived.references_secrets = True
-                if _SET_X_RE.search(cmd):
-                    dangerous.add("set_x")
-                    step.derived.has_set_x = True
-                if _CURL_PIPE_RE.search(cmd):
-                    dangerous.add("curl_pipe_shell")
-                    step.derived.has_curl_pipe_shell = True
-
-            if step.kind == "uses" and step.uses is not None:
-                # azure login detection
-                if step.uses.owner_repo and step.uses.owner_repo.lower() == "azure/login":
-                    uses_azure_login = True
-                    if step.with_keys and any(k.lower() in AZURE_WITH_KEYS_SECRET for k in step.with_keys):
-                        azure_with_secret = True
-
-            # env keys hints
-            if step.env_keys & AZURE_ENV_KEYS:
-                azure_env_injected = True
-
-        # job-level secrets heuristic
-        # v1: secrets in run commands or presence of common Azure credential env keys
-        job.derived.uses_secrets = uses_secrets or azure_env_injected
-        job.derived.dangerous_patterns = dangerous
-
-        # Azure auth detection hints (v1)
-        if uses_azure_login:
-            job.derived.dangerous_patterns.add("azure_login")
-        if uses_azure_cli:
-            job.derived.dangerous_patterns.add("azure_cli")
-        if azure_with_secret or azure_env_injected:
-            job.derived.dangerous_patterns.add("azure_secret_auth")
-
-        # OIDC heuristic (v1):
-        # if azure/login is used and effective permissions include id-token: write, assume OIDC intent
-        job.derived.uses_oidc = uses_azure_login and (job.derived.effective_permissions.get("id-token") == "write")
+        if do_steps:
+            _derive_steps(job)
 
     return wf
+
+
+def _derive_steps(job: JobIR) -> None:
+    # step-level analysis
+    uses_secrets = False
+    dangerous = set()
+    uses_azure_login = False
+    azure_env_injected = False
+    azure_with_secret = False
+    uses_azure_cli = False
+
+    for step in job.steps:
+        if step.kind == "run" and step.run is not None:
+            sd = step.derived = analyze_run(step.run.command or "")
+            if sd.uses_azure_cli:
+                uses_azure_cli = True
+            if sd.references_secrets:
+                uses_secrets = True
+            if sd.has_set_x:
+                dangerous.add("set_x")
+            if sd.has_curl_pipe_shell:
+                dangerous.add("curl_pipe_shell")
+
+        if step.kind == "uses" and step.uses is not None:
+            # azure login detection
+            if step.uses.owner_repo and step.uses.owner_repo.lower() == "azure/login":
+                uses_azure_login = True
+                if step.with_keys and any(k.lower() in AZURE_WITH_KEYS_SECRET for k in step.with_keys):
+                    azure_with_secret = True
+
+        # env keys hints
+        if step.env_keys & AZURE_ENV_KEYS:
+            azure_env_injected = True
+
+    # job-level secrets heuristic
+    # v1: secrets in run commands or presence of common Azure credential env keys
+    job.derived.uses_secrets = uses_secrets or azure_env_injected
+    job.derived.dangerous_patterns = dangerous
+
+    # Azure auth detection hints (v1)
+    if uses_azure_login:
+        job.derived.dangerous_patterns.add("azure_login")
+    if uses_azure_cli:
+        job.derived.dangerous_patterns.add("azure_cli")
+    if azure_with_secret or azure_env_injected:
+        job.derived.dangerous_patterns.add("azure_secret_auth")
+
+    # OIDC heuristic (v1):
+    # if azure/login is used and effective permissions include id-token: write, assume OIDC intent
+    # (effective permissions are empty when the permissions pass was skipped)
+    job.derived.uses_oidc = uses_azure_login and (job.derived.effective_permissions.get("id-token") == "write")
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import FrozenSet
+
+from .models import WorkflowIR
+
+
+@dataclass(frozen=True)
+class WorkflowIndex:
+    """Facts about a derived workflow that decide which controls apply.
+
+    Built once per scan so the engine can answer a control's applicability
+    predicate without the control walking the IR.
+    """
+
+    events: FrozenSet[str]
+    step_kinds: FrozenSet[str]
+    owner_repos: FrozenSet[str]  # lowercased `owner/repo` of every `uses:` step
+    has_azure_auth: bool         # azure/login or Azure CLI in any job
+    uses_secrets: bool           # any job derived uses_secrets
+
+
+def build_index(wf: WorkflowIR) -> WorkflowIndex:
+    kinds = set()
+    owner_repos = set()
+    has_azure = False
+    uses_secrets = False
+    for job in wf.jobs:
+        patterns = job.derived.dangerous_patterns
+        if "azure_login" in patterns or "azure_cli" in patterns:
+            has_azure = True
+        if job.derived.uses_secrets:
+            uses_secrets = True
+        for step in job.steps:
+            kinds.add(step.kind)
+            if step.uses is not None and step.uses.owner_repo:
+                owner_repos.add(step.uses.owner_repo.lower())
+    return WorkflowIndex(
+        events=frozenset(wf.triggers.events),
+        step_kinds=frozenset(kinds),
+        owner_repos=frozenset(owner_repos),
+        has_azure_auth=has_azure,
+        uses_secrets=uses_secrets,
+    )
@@ -1,33 +1,43 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional, Set, Literal
+from typing import Any, Dict, FrozenSet, List, Optional, Set, Literal, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from ..utils.locator import SourceIndex
 
 
 RefType = Literal["sha", "tag", "branch", "unknown"]
 StepKind = Literal["uses", "run", "other"]
 
+# All IR classes use __slots__: a large scan holds one StepIR (plus its location and run)
+# per step, and dropping the per-instance __dict__ is most of the saving. Value-like parts
+# (locations, `uses` refs, step flags, key sets) are immutable so identical ones are shared.
+
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class LocationIR:
     file_path: str
     start_line: Optional[int] = None
     end_line: Optional[int] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class PermissionsIR:
     mode: Literal["implicit", "explicit"] = "implicit"
     entries: Dict[str, str] = field(default_factory=dict)  # e.g. {"contents": "read", "id-token": "write"}
+    location: Optional[LocationIR] = None  # the `permissions:` key through its value
 
 
-@dataclass
+@dataclass(slots=True)
 class TriggerIR:
     events: Set[str] = field(default_factory=set)
     raw: Dict[str, Any] = field(default_factory=dict)
+    location: Optional[LocationIR] = None  # the `on:` key through its value
+    event_locations: Dict[str, LocationIR] = field(default_factory=dict)
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class UsesRefIR:
     full: str
     owner_repo: Optional[str] = None   # e.g. "actions/checkout"
@@ -35,33 +45,44 @@ class UsesRefIR:
     ref_type: RefType = "unknown"      # sha|tag|branch|unknown
 
 
-@dataclass
+@dataclass(slots=True)
 class RunIR:
     shell: Optional[str] = None
     command: str = ""
+    location: Optional[LocationIR] = None  # the `run:` value
+    span: Optional[Tuple[int, int]] = None  # character offsets of the `run:` value in source_text
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class StepDerivedIR:
+    # Built for run steps by `run_analysis.analyze_run`; one shared instance per flag combination.
     references_secrets: bool = False
-    has_set_x: bool = False
+    has_set_x: bool = False             # `set -x` at line start (derivation heuristic)
     has_curl_pipe_shell: bool = False
+    uses_azure_cli: bool = False
+    has_xtrace: bool = False            # `set -x` anywhere or `xtrace` (L1-05)
+    has_env_dump: bool = False          # printenv/env or PowerShell Env: listing (L1-05)
+    has_secret_echo: bool = False       # secrets.* expression plus echo-like command (L1-05)
+    has_remote_script_exec: bool = False  # curl|bash, bash -c "$(curl", iwr|iex (L2-07)
+
 
+NO_STEP_FLAGS = StepDerivedIR()
 
-@dataclass
+
+@dataclass(slots=True)
 class StepIR:
     index: int
     name: Optional[str] = None
     kind: StepKind = "other"
     uses: Optional[UsesRefIR] = None
     run: Optional[RunIR] = None
-    env_keys: Set[str] = field(default_factory=set)
-    with_keys: Set[str] = field(default_factory=set)
-    derived: StepDerivedIR = field(default_factory=StepDerivedIR)
+    env_keys: FrozenSet[str] = frozenset()
+    with_keys: FrozenSet[str] = frozenset()
+    derived: StepDerivedIR = NO_STEP_FLAGS
     location: Optional[LocationIR] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class JobDerivedIR:
     uses_secrets: bool = False
     uses_oidc: bool = False
@@ -72,7 +93,7 @@ class JobDerivedIR:
     effective_permissions_mode: Literal["implicit", "explicit"] = "implicit"
 
 
-@dataclass
+@dataclass(slots=True)
 class JobIR:
     job_id: str
     name: Optional[str] = None
@@ -84,7 +105,7 @@ class JobIR:
     location: Optional[LocationIR] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class WorkflowDerivedIR:
     has_pull_request_target: bool = False
     has_pull_request: bool = False
@@ -92,7 +113,7 @@ class WorkflowDerivedIR:
     effective_permissions_mode: Literal["implicit", "explicit"] = "implicit"
 
 
-@dataclass
+@dataclass(slots=True)
 class WorkflowIR:
     file_path: str
     name: Optional[str] = None
@@ -101,3 +122,10 @@ class WorkflowIR:
     jobs: List[JobIR] = field(default_factory=list)
     derived: WorkflowDerivedIR = field(default_factory=WorkflowDerivedIR)
     source_text: Optional[str] = None
+    source_index: Optional["SourceIndex"] = None
+    location: Optional[LocationIR] = None
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        # Pickle (process pools, copy.deepcopy) through the compact binary codec.
+        from .codec import decode_workflow, encode_workflow
+        return decode_workflow, (encode_workflow(self),)
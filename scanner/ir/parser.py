@@ -1,14 +1,26 @@
 from __future__ import annotations
 
-from typing import Any
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, Optional, Tuple
 import re
+import sys
 import yaml
 
 from .models import (
-    WorkflowIR, TriggerIR, PermissionsIR, JobIR, StepIR, UsesRefIR, RunIR
+    WorkflowIR, TriggerIR, PermissionsIR, JobIR, StepIR, UsesRefIR, RunIR, LocationIR
 )
+from ..utils.locator import SourceIndex
 from ..utils.text import classify_ref_type
 
+# Prefer the libyaml-backed loader; it is several times faster than the pure-Python one
+# and builds the same data. PyYAML only exposes CSafeLoader when built with libyaml.
+try:
+    _SafeLoader = yaml.CSafeLoader
+    YAML_LOADER = "libyaml"
+except AttributeError:  # pragma: no cover - depends on the PyYAML build
+    _SafeLoader = yaml.SafeLoader
+    YAML_LOADER = "pure-python"
+
 
 def _parse_permissions(node: Any) -> PermissionsIR:
     # GitHub Actions supports:
@@ -68,46 +80,152 @@ def _parse_triggers(on_node: Any) -> TriggerIR:
 _USES_RE = re.compile(r"^([^@\s]+)@([^\s]+)$")
 
 
+@lru_cache(maxsize=4096)
 def _parse_uses(value: str) -> UsesRefIR:
-    full = value.strip()
+    # The same few actions recur across every workflow; steps share one frozen UsesRefIR each.
+    full = sys.intern(value.strip())
     m = _USES_RE.match(full)
     if not m:
         return UsesRefIR(full=full, owner_repo=None, ref=None, ref_type="unknown")
-    owner_repo, ref = m.group(1), m.group(2)
+    owner_repo, ref = sys.intern(m.group(1)), sys.intern(m.group(2))
     ref_type = classify_ref_type(ref)
     return UsesRefIR(full=full, owner_repo=owner_repo, ref=ref, ref_type=ref_type)
 
 
-def parse_workflow_yaml(file_path: str, text: str) -> WorkflowIR:
-    data = yaml.safe_load(text) or {}
-    wf = WorkflowIR(file_path=file_path, name=(data.get("name") if isinstance(data, dict) else None))
+def _key_set(node: Any) -> FrozenSet[str]:
+    if not isinstance(node, dict):
+        return frozenset()
+    return _shared_keys(tuple(sys.intern(k) for k in node if isinstance(k, str)))
+
+
+@lru_cache(maxsize=4096)
+def _shared_keys(keys: Tuple[str, ...]) -> FrozenSet[str]:
+    return frozenset(keys)
+
+
+class _Locator:
+    """Turns PyYAML node marks into 1-based LocationIR line ranges."""
+
+    def __init__(self, file_path: str, text: str) -> None:
+        self.file_path = file_path
+        self.text = text
+
+    def span(self, start: Optional[yaml.Node], end: Optional[yaml.Node] = None) -> Optional[LocationIR]:
+        if start is None:
+            return None
+        end = end or start
+        # Block nodes end where the next token starts (often the following line);
+        # back off over trailing whitespace so the range ends on the node's last line.
+        stop = end.end_mark.index
+        end_line = end.end_mark.line
+        floor = start.start_mark.index
+        while stop > floor and self.text[stop - 1] in " \t\r\n":
+            stop -= 1
+            if self.text[stop] == "\n":
+                end_line -= 1
+        return LocationIR(
+            file_path=self.file_path,
+            start_line=start.start_mark.line + 1,
+            end_line=max(end_line, start.start_mark.line) + 1,
+        )
+
+    def entry(self, entries: Dict[str, Tuple[yaml.Node, yaml.Node]], key: str) -> Optional[LocationIR]:
+        """Location of `key: value` in a mapping, from the key line to the end of the value."""
+        kv = entries.get(key)
+        return self.span(kv[0], kv[1]) if kv else None
+
+
+def _mapping_nodes(node: Optional[yaml.Node]) -> Dict[str, Tuple[yaml.Node, yaml.Node]]:
+    # Keyed by the raw scalar text (so `on` is found even though it resolves to a bool).
+    if not isinstance(node, yaml.MappingNode):
+        return {}
+    out: Dict[str, Tuple[yaml.Node, yaml.Node]] = {}
+    for k, v in node.value:
+        if isinstance(k, yaml.ScalarNode):
+            out[k.value] = (k, v)
+    return out
+
+
+def _value_node(entries: Dict[str, Tuple[yaml.Node, yaml.Node]], key: str) -> Optional[yaml.Node]:
+    kv = entries.get(key)
+    return kv[1] if kv else None
+
+
+def _trigger_locations(loc: _Locator, on_node: Optional[yaml.Node]) -> Dict[str, LocationIR]:
+    out: Dict[str, LocationIR] = {}
+    if isinstance(on_node, yaml.ScalarNode):
+        out[on_node.value] = loc.span(on_node)
+    elif isinstance(on_node, yaml.SequenceNode):
+        for it in on_node.value:
+            if isinstance(it, yaml.ScalarNode):
+                out.setdefault(it.value, loc.span(it))
+    elif isinstance(on_node, yaml.MappingNode):
+        for k, v in on_node.value:
+            if isinstance(k, yaml.ScalarNode):
+                out[k.value] = loc.span(k, v)
+    return out
+
+
+def _load_document(text: str, loader: Any) -> Tuple[Any, Optional[yaml.Node]]:
+    # Same as yaml.load(), but keeps the composed node tree for source locations.
+    ldr = (loader or _SafeLoader)(text)
+    try:
+        node = ldr.get_single_node()
+        data = ldr.construct_document(node) if node is not None else None
+    finally:
+        ldr.dispose()
+    return data, node
+
+
+def parse_workflow_yaml(file_path: str, text: str, *, loader: Any = None) -> WorkflowIR:
+    """Parse workflow YAML into IR. `loader` overrides the default (libyaml when available) PyYAML loader.
+
+    Data comes from the constructed document; locations come from the marks of
+    the same parse's node tree.
+    """
+    data, root = _load_document(text, loader)
+    data = data or {}
+    name = data.get("name") if isinstance(data, dict) else None
+    wf = WorkflowIR(file_path=file_path, name=name if isinstance(name, str) else None)
     wf.source_text = text
+    wf.source_index = SourceIndex(text)
 
     if not isinstance(data, dict):
         return wf
 
+    loc = _Locator(file_path, text)
+    wf.location = loc.span(root)
+    top = _mapping_nodes(root)
+
     wf.triggers = _parse_triggers(data.get("on"))
+    wf.triggers.location = loc.entry(top, "on")
+    wf.triggers.event_locations = _trigger_locations(loc, _value_node(top, "on"))
     wf.permissions = _parse_permissions(data.get("permissions"))
+    wf.permissions.location = loc.entry(top, "permissions")
 
     jobs_node = data.get("jobs", {})
     if not isinstance(jobs_node, dict):
         return wf
+    job_nodes = _mapping_nodes(_value_node(top, "jobs"))
 
     for job_id, job_node in jobs_node.items():
         if not isinstance(job_id, str) or not isinstance(job_node, dict):
             continue
 
-        job = JobIR(job_id=job_id, name=job_node.get("name") if isinstance(job_node.get("name"), str) else None)
+        job = JobIR(job_id=sys.intern(job_id), name=job_node.get("name") if isinstance(job_node.get("name"), str) else None)
+        job.location = loc.entry(job_nodes, job_id)
+        job_entries = _mapping_nodes(_value_node(job_nodes, job_id))
 
         runs_on = job_node.get("runs-on")
         if isinstance(runs_on, str):
-            job.runs_on = [runs_on]
+            job.runs_on = [sys.intern(runs_on)]
         elif isinstance(runs_on, list):
-            job.runs_on = [str(x) for x in runs_on]
+            job.runs_on = [sys.intern(str(x)) for x in runs_on]
         else:
             job.runs_on = []
 
         job.permissions = _parse_permissions(job_node.get("permissions"))
+        job.permissions.location = loc.entry(job_entries, "permissions")
 
         env = job_node.get("environment")
         if isinstance(env, str):
@@ -116,9 +234,13 @@ def parse_workflow_yaml(file_path: str, text: str) -> WorkflowIR:
             job.environment = env.get("name")
 
         steps_node = job_node.get("steps", [])
+        step_nodes = _value_node(job_entries, "steps")
+        step_items = step_nodes.value if isinstance(step_nodes, yaml.SequenceNode) else []
         if isinstance(steps_node, list):
             for idx, st in enumerate(steps_node):
                 step = StepIR(index=idx)
+                item_node = step_items[idx] if idx < len(step_items) else None
+                step.location = loc.span(item_node)
 
                 if isinstance(st, dict):
                     if isinstance(st.get("name"), str):
@@ -129,24 +251,18 @@ def parse_workflow_yaml(file_path: str, text: str) -> WorkflowIR:
                         step.uses = _parse_uses(st["uses"])
                     elif isinstance(st.get("run"), str):
                         step.kind = "run"
+                        run_node = _value_node(_mapping_nodes(item_node), "run")
                         step.run = RunIR(
                             shell=st.get("shell") if isinstance(st.get("shell"), str) else None,
                             command=st["run"],
+                            location=loc.span(run_node),
+                            span=(run_node.start_mark.index, run_node.end_mark.index) if run_node is not None else None,
                         )
                     else:
                         step.kind = "other"
 
-                    with_node = st.get("with")
-                    if isinstance(with_node, dict):
-                        for k in with_node.keys():
-                            if isinstance(k, str):
-                                step.with_keys.add(k)
-
-                    env_node = st.get("env")
-                    if isinstance(env_node, dict):
-                        for k in env_node.keys():
-                            if isinstance(k, str):
-                                step.env_keys.add(k)
+                    step.with_keys = _key_set(st.get("with"))
+                    step.env_keys = _key_set(st.get("env"))
 
                 job.steps.append(step)
 
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+
+from .models import NO_STEP_FLAGS, StepDerivedIR
+
+# All run-step patterns live here so each `run:` block is scanned once, during
+# derivation. Controls read the resulting StepDerivedIR flags.
+
+# Derivation heuristics
+SECRETS_RE = re.compile(r"\$\{\{\s*secrets\.[A-Za-z0-9_]+\s*\}\}")
+SET_X_RE = re.compile(r"(^|\n)\s*set\s+-x\b")
+CURL_PIPE_RE = re.compile(r"(curl\s+[^\n\r]*\|\s*(bash|sh))|(wget\s+[^\n\r]*\|\s*(bash|sh))", re.IGNORECASE)
+AZ_CLI_RE = re.compile(r"\baz\s+(login|account|deployment|keyvault|aks|acr)\b", re.IGNORECASE)
+
+# L1-05 log leaks
+XTRACE_RE = re.compile(r"(^|\s)set\s+-x(\s|$)|xtrace", re.IGNORECASE | re.MULTILINE)
+PRINTENV_RE = re.compile(r"(^|\s)(printenv|env)(\s|$)", re.IGNORECASE | re.MULTILINE)
+PS_ENV_DUMP_RE = re.compile(r"Get-ChildItem\s+Env:|gci\s+Env:|dir\s+Env:", re.IGNORECASE | re.MULTILINE)
+SECRET_EXPR_RE = re.compile(r"\$\{\{\s*secrets\.[^\s\}]+\s*\}\}")
+ECHO_LIKE_RE = re.compile(r"(^|\s)(echo|printf|Write-Output|Write-Host)\s+", re.IGNORECASE | re.MULTILINE)
+
+# L2-07 remote script execution
+PIPE_SHELL_RE = re.compile(r"\b(curl|wget)\b[^\n\r]*\|\s*(bash|sh)\b", re.IGNORECASE | re.MULTILINE)
+CURL_BASH_SUBSHELL_RE = re.compile(r"\b(bash|sh)\s+-c\s+\"\$\(\s*(curl|wget)\b", re.IGNORECASE | re.MULTILINE)
+POWERSHELL_IEX_RE = re.compile(r"\b(iwr|Invoke-WebRequest)\b[^\n\r]*\|\s*(iex|Invoke-Expression)\b", re.IGNORECASE | re.MULTILINE)
+
+
+@lru_cache(maxsize=None)
+def _flags(**values: bool) -> StepDerivedIR:
+    # At most 2**8 combinations, so every run step shares one of a handful of instances.
+    return StepDerivedIR(**values)
+
+
+def analyze_run(command: str) -> StepDerivedIR:
+    """Extract every run-step feature in one pass over `command`.
+
+    Cheap substring checks gate each regex: a pattern is only run when the
+    literal it cannot match without is present.
+    """
+    if not command:
+        return NO_STEP_FLAGS
+    low = command.lower()
+
+    references_secrets = has_secret_echo = False
+    if "secrets." in command:
+        references_secrets = SECRETS_RE.search(command) is not None
+        has_secret_echo = SECRET_EXPR_RE.search(command) is not None and ECHO_LIKE_RE.search(command) is not None
+
+    has_set_x = "set" in command and SET_X_RE.search(command) is not None
+    has_xtrace = ("set" in low or "xtrace" in low) and XTRACE_RE.search(command) is not None
+    has_env_dump = "env" in low and (
+        PRINTENV_RE.search(command) is not None or PS_ENV_DUMP_RE.search(command) is not None
+    )
+
+    has_fetch = "curl" in low or "wget" in low
+    has_curl_pipe_shell = has_fetch and CURL_PIPE_RE.search(command) is not None
+    has_remote_script_exec = (
+        (has_fetch and (PIPE_SHELL_RE.search(command) is not None or CURL_BASH_SUBSHELL_RE.search(command) is not None))
+        or (("iwr" in low or "invoke-webrequest" in low) and POWERSHELL_IEX_RE.search(command) is not None)
+    )
+
+    uses_azure_cli = "az" in low and AZ_CLI_RE.search(command) is not None
+
+    return _flags(
+        references_secrets=references_secrets,
+        has_set_x=has_set_x,
+        has_curl_pipe_shell=has_curl_pipe_shell,
+        uses_azure_cli=uses_azure_cli,
+        has_xtrace=has_xtrace,
+        has_env_dump=has_env_dump,
+        has_secret_echo=has_secret_echo,
+        has_remote_script_exec=has_remote_script_exec,
+    )
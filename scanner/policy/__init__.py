@@ -6,11 +6,13 @@ We re-export the validation API and policy presets here.
 
 from .loader import validate_policy, PolicyValidationError
 from .presets import PRESET_NAMES, get_preset_policy
+from .compiled import CompiledPolicy
 
 __all__ = [
     "validate_policy",
     "PolicyValidationError",
     "PRESET_NAMES",
     "get_preset_policy",
+    "CompiledPolicy",
 ]
 
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, fields
+from typing import Any, Dict, Mapping, Tuple
+
+
+@dataclass(frozen=True)
+class CompiledPolicy:
+    """Typed, immutable view of a merged policy dict.
+
+    Built once per Scanner so controls read attributes instead of doing
+    `bool(policy.get(...))` lookups on every evaluation. Field defaults are
+    the values controls assumed when a key was missing.
+    """
+
+    # L1-01
+    allow_semver_tags: bool = False
+
+    # L1-02
+    require_explicit_permissions: bool = True
+    forbid_write_all: bool = True
+
+    # L1-05
+    forbid_secret_echo: bool = True
+    forbid_set_x: bool = False
+    forbid_env_dump: bool = False
+
+    # L2-07
+    forbid_pipe_to_shell: bool = True
+
+    # L2-09
+    require_azure_oidc: bool = True
+    forbid_azure_credentials_secret: bool = True
+    require_id_token_write: bool = True
+    forbid_oidc_on_untrusted_triggers: bool = False
+    trusted_triggers_for_oidc: Tuple[str, ...] = ("push", "workflow_dispatch", "schedule")
+
+    @classmethod
+    def from_dict(cls, policy: Mapping[str, Any] | None) -> "CompiledPolicy":
+        policy = policy or {}
+        values: Dict[str, Any] = {}
+        for f in fields(cls):
+            if f.name not in policy:
+                continue
+            v = policy[f.name]
+            if f.name == "trusted_triggers_for_oidc":
+                if v is not None:
+                    values[f.name] = tuple(str(x) for x in v)
+            else:
+                values[f.name] = bool(v)
+        return cls(**values)
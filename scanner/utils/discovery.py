@@ -0,0 +1,297 @@
+from __future__ import annotations
+
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Pattern, Sequence, Tuple
+
+from .git import local_uses_targets
+
+WORKFLOW_SUFFIXES = (".yml", ".yaml")
+ACTION_FILENAMES = {"action.yml", "action.yaml"}
+
+# Never contain workflows worth scanning; skipped without reading their contents.
+PRUNE_DIRS = frozenset({
+    ".git", ".hg", ".svn",
+    "node_modules", "bower_components",
+    "__pycache__", ".venv", "venv", ".tox", ".nox",
+    ".mypy_cache", ".pytest_cache", ".ruff_cache",
+})
+
+
+def _glob_to_regex(pattern: str) -> str:
+    """Translate a gitignore-style glob (`*`, `?`, `[...]`, `**`) to a regex over '/'-separated paths."""
+    out: List[str] = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+        elif c == "*":
+            out.append("[^/]*")
+            i += 1
+        elif c == "?":
+            out.append("[^/]")
+            i += 1
+        elif c == "[":
+            j = pattern.find("]", i + 1)
+            if j == -1:
+                out.append(re.escape(c))
+                i += 1
+            else:
+                body = pattern[i + 1:j]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append(f"[{body}]")
+                i = j + 1
+        else:
+            out.append(re.escape(c))
+            i += 1
+    return "".join(out)
+
+
+@dataclass(frozen=True)
+class IgnoreRule:
+    regex: Pattern[str]
+    negate: bool
+    dir_only: bool
+
+
+def compile_ignore(lines: Sequence[str]) -> List[IgnoreRule]:
+    """Compile .gitignore-style lines into rules matched against paths relative to the file's directory."""
+    rules: List[IgnoreRule] = []
+    for raw in lines:
+        line = raw.rstrip("\n").rstrip()
+        if not line or line.startswith("#"):
+            continue
+        negate = line.startswith("!")
+        if negate:
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        if not line:
+            continue
+        # A slash anywhere but the end anchors the pattern; otherwise it matches at any depth.
+        anchored = "/" in line
+        line = line.lstrip("/")
+        prefix = "" if anchored else "(?:.*/)?"
+        rules.append(IgnoreRule(re.compile(f"{prefix}{_glob_to_regex(line)}"), negate, dir_only))
+    return rules
+
+
+def _ignored(rules: Sequence[Tuple[str, List[IgnoreRule]]], rel: str, is_dir: bool) -> bool:
+    # Last matching rule wins, with deeper .gitignore files evaluated after shallower ones.
+    ignored = False
+    for base, rs in rules:
+        if base:
+            if not rel.startswith(base + "/"):
+                continue
+            sub = rel[len(base) + 1:]
+        else:
+            sub = rel
+        for r in rs:
+            if r.dir_only and not is_dir:
+                continue
+            if r.regex.fullmatch(sub):
+                ignored = not r.negate
+    return ignored
+
+
+def _is_workflows_dir(rel_dir: str) -> bool:
+    return rel_dir == ".github/workflows" or rel_dir.endswith("/.github/workflows")
+
+
+def _is_workflow_location(rel_dir: str, name: str) -> bool:
+    if name in ACTION_FILENAMES:
+        return True
+    return _is_workflows_dir(rel_dir) and name.endswith(WORKFLOW_SUFFIXES)
+
+
+@dataclass
+class DiscoveryStats:
+    dirs: int = 0
+    files: int = 0
+    pruned: int = 0
+    seconds: float = 0.0
+
+
+@dataclass
+class Discovery:
+    """Single `os.scandir` walk collecting YAML files to scan.
+
+    Directories in PRUNE_DIRS, paths ignored by `.gitignore` files found during the
+    walk and paths matching `exclude` globs are skipped without being descended
+    into. With `include`, only files matching one of the globs are kept. Globs are
+    matched against paths relative to the walk root. `select` applies the same
+    rules to an already known list of paths.
+
+    With `workflows_only`, the walk root is treated as a repository root and only
+    the locations GitHub reads are visited: its `.github` directory (not below
+    `.github/workflows`, which GitHub does not search), an `action.yml|yaml` at the
+    root, and the local actions that those files reference with `uses: ./...`.
+    Every other top-level directory is pruned.
+    """
+
+    include: Sequence[str] = ()
+    exclude: Sequence[str] = ()
+    workflows_only: bool = False
+    use_gitignore: bool = True
+    stats: DiscoveryStats = field(default_factory=DiscoveryStats)
+
+    def __post_init__(self) -> None:
+        self._include = compile_ignore(self.include)
+        self._exclude = compile_ignore(self.exclude)
+
+    def collect(self, base: Path) -> List[Path]:
+        if base.is_file():
+            return [base] if base.name.endswith(WORKFLOW_SUFFIXES) else []
+
+        t0 = time.perf_counter()
+        found: List[Path] = []
+        ignore: List[Tuple[str, List[IgnoreRule]]] = [("", self._exclude)] if self._exclude else []
+        if self.workflows_only:
+            self._collect_workflow_locations(base, ignore, found)
+        else:
+            self._walk(str(base), "", ignore, found)
+        self.stats.seconds = time.perf_counter() - t0
+        self.stats.files = len(found)
+        return sorted(found)
+
+    def select(self, base: Path, paths: Iterable[Path]) -> List[Path]:
+        """The subset of `paths` (files under directory `base`) that `collect(base)` would return."""
+        kept = self._select(base, paths)
+        if self.workflows_only and kept:
+            # Only referenced actions count; the pruned walk is cheap enough to ask it.
+            reachable = {p.resolve() for p in Discovery(
+                include=self.include, exclude=self.exclude, workflows_only=True, use_gitignore=self.use_gitignore,
+            ).collect(base)}
+            kept = [p for p in kept if p.resolve() in reachable]
+        return kept
+
+    def _select(self, base: Path, paths: Iterable[Path]) -> List[Path]:
+        root = base.resolve()
+        start: List[Tuple[str, List[IgnoreRule]]] = [("", self._exclude)] if self._exclude else []
+        # rel_dir -> ignore rules in effect inside it, or None when the directory is pruned.
+        dirs: Dict[str, Optional[List[Tuple[str, List[IgnoreRule]]]]] = {"": self._with_gitignore(base, "", start)}
+        kept: List[Path] = []
+        for p in paths:
+            try:
+                parts = p.resolve().relative_to(root).parts
+            except ValueError:
+                continue
+            if not parts:
+                continue
+            rel_dir = ""
+            ignore = dirs[""]
+            for name in parts[:-1]:
+                if ignore is None:
+                    break
+                rel = f"{rel_dir}/{name}" if rel_dir else name
+                if rel not in dirs:
+                    if name in PRUNE_DIRS or _ignored(ignore, rel, True):
+                        dirs[rel] = None
+                    else:
+                        dirs[rel] = self._with_gitignore(base / rel, rel, ignore)
+                rel_dir, ignore = rel, dirs[rel]
+            if ignore is None or not p.is_file():
+                continue
+            if self._keep_file(rel_dir, parts[-1], ignore):
+                kept.append(base / Path(*parts))
+        return sorted(kept)
+
+    def _with_gitignore(
+        self, path: Path, rel_dir: str, ignore: List[Tuple[str, List[IgnoreRule]]]
+    ) -> List[Tuple[str, List[IgnoreRule]]]:
+        if not self.use_gitignore:
+            return ignore
+        try:
+            with open(path / ".gitignore", encoding="utf-8", errors="replace") as fh:
+                rules = compile_ignore(fh.readlines())
+        except OSError:
+            return ignore
+        return ignore + [(rel_dir, rules)] if rules else ignore
+
+    def _keep_file(self, rel_dir: str, name: str, ignore: List[Tuple[str, List[IgnoreRule]]]) -> bool:
+        if not name.endswith(WORKFLOW_SUFFIXES):
+            return False
+        if self.workflows_only and not _is_workflow_location(rel_dir, name):
+            return False
+        rel = f"{rel_dir}/{name}" if rel_dir else name
+        if _ignored(ignore, rel, False):
+            return False
+        if self._include and not any(r.regex.fullmatch(rel) for r in self._include):
+            return False
+        return True
+
+    def _collect_workflow_locations(
+        self, base: Path, ignore: List[Tuple[str, List[IgnoreRule]]], found: List[Path]
+    ) -> None:
+        self.stats.dirs += 1
+        try:
+            entries = list(os.scandir(base))
+        except OSError:
+            return
+        ignore = self._with_gitignore(base, "", ignore)
+
+        for e in entries:
+            if e.is_dir(follow_symlinks=False):
+                if e.name == ".github" and not _ignored(ignore, e.name, True):
+                    self._walk(e.path, e.name, ignore, found)
+                else:
+                    self.stats.pruned += 1
+            elif e.name in ACTION_FILENAMES and e.is_file() and self._keep_file("", e.name, ignore):
+                found.append(Path(e.path))
+
+        # Follow `uses: ./...` to local actions, including composite actions using others.
+        root = base.resolve()
+        seen = {p.resolve() for p in found}
+        queue = list(found)
+        while queue:
+            try:
+                text = queue.pop().read_text(encoding="utf-8")
+            except (OSError, UnicodeDecodeError):
+                continue
+            for target in local_uses_targets(text, root):
+                if target.name.endswith(WORKFLOW_SUFFIXES):
+                    candidates = [target]
+                else:
+                    candidates = [target / n for n in sorted(ACTION_FILENAMES)]
+                for p in self._select(base, candidates):
+                    r = p.resolve()
+                    if r not in seen:
+                        seen.add(r)
+                        found.append(p)
+                        queue.append(p)
+
+    def _walk(self, path: str, rel_dir: str, ignore: List[Tuple[str, List[IgnoreRule]]], found: List[Path]) -> None:
+        self.stats.dirs += 1
+        try:
+            entries = list(os.scandir(path))
+        except OSError:
+            return
+
+        if self.use_gitignore and any(e.name == ".gitignore" for e in entries):
+            ignore = self._with_gitignore(Path(path), rel_dir, ignore)
+        # GitHub only reads the top level of .github/workflows.
+        prune_subdirs = self.workflows_only and _is_workflows_dir(rel_dir)
+
+        subdirs: List[Tuple[str, str]] = []
+        for e in entries:
+            rel = f"{rel_dir}/{e.name}" if rel_dir else e.name
+            if e.is_dir(follow_symlinks=False):
+                if prune_subdirs or e.name in PRUNE_DIRS or _ignored(ignore, rel, True):
+                    self.stats.pruned += 1
+                    continue
+                subdirs.append((e.path, rel))
+            elif e.name.endswith(WORKFLOW_SUFFIXES) and e.is_file():
+                if self._keep_file(rel_dir, e.name, ignore):
+                    found.append(Path(e.path))
+
+        for sub_path, sub_rel in subdirs:
+            self._walk(sub_path, sub_rel, ignore, found)
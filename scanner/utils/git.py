@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import re
+import subprocess
+from pathlib import Path
+from typing import Dict, Iterable, List, Set
+
+WORKFLOW_SUFFIXES = {".yml", ".yaml"}
+
+# `uses: ./path/to/action` or `uses: ./.github/workflows/reusable.yml` (optionally quoted, list item or not)
+_LOCAL_USES_RE = re.compile(r"""^\s*(?:-\s+)?uses:\s*["']?(\./[^\s"'#@]+)""", re.MULTILINE)
+
+
+class GitError(RuntimeError):
+    pass
+
+
+def _git(cwd: Path, *args: str) -> str:
+    try:
+        proc = subprocess.run(
+            ["git", *args],
+            cwd=cwd,
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+    except FileNotFoundError as e:
+        raise GitError("git executable not found") from e
+    if proc.returncode != 0:
+        raise GitError(f"git {' '.join(args)} failed: {proc.stderr.strip()}")
+    return proc.stdout
+
+
+def _split_z(out: str) -> List[str]:
+    return [p for p in out.split("\0") if p]
+
+
+def repo_root(path: Path) -> Path:
+    start = path if path.is_dir() else path.parent
+    return Path(_git(start, "rev-parse", "--show-toplevel").strip()).resolve()
+
+
+def changed_files(root: Path, ref: str, *, committed_only: bool = False) -> Set[Path]:
+    """Files changed since the merge-base of `ref` and HEAD, deleted files included.
+
+    By default the comparison is against the working tree (staged, unstaged and
+    untracked files count); with committed_only it is against HEAD.
+    """
+    base = _git(root, "merge-base", ref, "HEAD").strip()
+    # Deleted paths are kept (and renames split into delete + add): removing a local
+    # action is exactly when the workflows using it need a re-scan.
+    diff_args = ["diff", "--name-only", "-z", "--no-renames", base]
+    if committed_only:
+        diff_args.append("HEAD")
+    names = _split_z(_git(root, *diff_args))
+    if not committed_only:
+        names += _split_z(_git(root, "ls-files", "-z", "--others", "--exclude-standard"))
+    return {(root / n).resolve() for n in names}
+
+
+def workflow_files(root: Path, base: Path) -> List[Path]:
+    """Tracked and untracked (non-ignored) .yml/.yaml files under `base`, from the git index."""
+    out = _git(root, "ls-files", "-z", "--cached", "--others", "--exclude-standard", "--", str(base.resolve()))
+    paths = {(root / n).resolve() for n in _split_z(out)}
+    return sorted(p for p in paths if p.suffix in WORKFLOW_SUFFIXES and p.is_file())
+
+
+def local_uses_targets(text: str, root: Path) -> List[Path]:
+    """Resolve `uses: ./...` references (local actions and reusable workflows) against the repo root."""
+    return [(root / m.group(1)).resolve() for m in _LOCAL_USES_RE.finditer(text)]
+
+
+def _touches(target: Path, affected: Iterable[Path]) -> bool:
+    # A local action is a directory (action.yml plus its scripts); a reusable workflow is a file.
+    for p in affected:
+        if p == target or target in p.parents:
+            return True
+    return False
+
+
+def select_changed_workflows(base: Path, ref: str, *, committed_only: bool = False) -> List[Path]:
+    """Workflow files under `base` that changed since `ref`, plus those reaching them via local `uses: ./...`."""
+    root = repo_root(base)
+    changed = changed_files(root, ref, committed_only=committed_only)
+    candidates = workflow_files(root, base)
+
+    targets: Dict[Path, List[Path]] = {}
+    for p in candidates:
+        refs = local_uses_targets(p.read_text(encoding="utf-8"), root)
+        if refs:
+            targets[p] = refs
+
+    affected: Set[Path] = set(changed)
+    selected = {p for p in candidates if p in changed}
+
+    # Propagate through chains of local actions / reusable workflows until nothing new is reached.
+    grew = True
+    while grew:
+        grew = False
+        for p, refs in targets.items():
+            if p in selected:
+                continue
+            if any(_touches(t, affected) for t in refs):
+                selected.add(p)
+                affected.add(p)
+                grew = True
+
+    return sorted(selected)
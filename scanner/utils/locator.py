@@ -1,78 +1,65 @@
 from __future__ import annotations
 
-from typing import Optional
-import re
+from bisect import bisect_right
+from typing import List, Optional, Pattern, Sequence
 
+from ..ir.models import StepIR, WorkflowIR
 
-def find_first_uses_line(text: str | None, uses_value: str) -> Optional[int]:
-    if not text:
-        return None
-    pattern = re.compile(r"^\s*-\s*uses:\s*%s\s*$" % re.escape(uses_value))
-    for i, line in enumerate(text.splitlines(), start=1):
-        if pattern.search(line):
-            return i
-    return None
 
+class SourceIndex:
+    """Line-start offset table for a workflow's source text, built once per parse.
 
-def find_permissions_line(text: str | None) -> Optional[int]:
-    if not text:
-        return None
-    pattern = re.compile(r"^\s*permissions:\s*$")
-    for i, line in enumerate(text.splitlines(), start=1):
-        if pattern.search(line):
-            return i
-    return None
+    Maps character offsets (e.g. regex match positions or YAML mark indexes)
+    to 1-based line numbers with a binary search instead of re-splitting the text.
+    """
 
-def find_on_line(text: str | None) -> Optional[int]:
-    """Best-effort 1-based line number for the top-level `on:` key."""
-    if not text:
-        return None
-    pattern = re.compile(r"^\s*on:\s*.*$")
-    for i, line in enumerate(text.splitlines(), start=1):
-        if pattern.search(line):
-            return i
-    return None
+    __slots__ = ("text", "line_starts")
 
+    def __init__(self, text: str, line_starts: Optional[Sequence[int]] = None) -> None:
+        self.text = text
+        if line_starts is not None:
+            # Precomputed (e.g. by the IR codec); must be the table built below.
+            self.line_starts = line_starts
+            return
+        starts: List[int] = [0]
+        find = text.find
+        i = find("\n")
+        while i != -1:
+            starts.append(i + 1)
+            i = find("\n", i + 1)
+        self.line_starts = starts
 
-def find_trigger_line(text: str | None, event: str) -> Optional[int]:
-    """Best-effort 1-based line number for a trigger inside `on:`.
+    def __eq__(self, other: object) -> bool:
+        # Lets WorkflowIR compare by value; the table may be a list or an array.
+        if not isinstance(other, SourceIndex):
+            return NotImplemented
+        return self.text == other.text and list(self.line_starts) == list(other.line_starts)
 
-    Handles common forms:
-      - on: { pull_request: {...} }
-      - on:
-          pull_request:
-          push:
-      - on: [push, pull_request]
-    """
-    if not text:
-        return None
+    __hash__ = None  # type: ignore[assignment]
 
-    event = event.strip()
-    # mapping style: line begins with the event key, typically indented under `on:`
-    pattern_key = re.compile(r"^\s*%s\s*:\s*(#.*)?$" % re.escape(event))
+    def line_of(self, offset: int) -> int:
+        return bisect_right(self.line_starts, offset)
 
-    # list style: on: [push, pull_request]
-    pattern_list = re.compile(r"^\s*on:\s*\[(.*?)\]\s*(#.*)?$")
+    def search_line(self, rx: Pattern[str], start: int = 0, end: Optional[int] = None) -> Optional[int]:
+        """1-based line of the first match of `rx` within text[start:end], or None."""
+        m = rx.search(self.text, start, len(self.text) if end is None else end)
+        return self.line_of(m.start()) if m else None
 
-    for i, line in enumerate(text.splitlines(), start=1):
-        if pattern_key.search(line):
-            return i
-        m = pattern_list.search(line)
-        if m:
-            inside = m.group(1)
-            # naive contains check with token boundaries
-            tokens = [t.strip().strip("'\"") for t in inside.split(",")]
-            if event in tokens:
-                return i  # best effort: same line as `on: [...]`
-    return None
 
+def run_match_line(wf: WorkflowIR, step: StepIR, *patterns: Pattern[str]) -> Optional[int]:
+    """Absolute line of the first pattern (in order) matching inside the step's `run:` block.
 
-def find_first_regex_line(text: str | None, pattern: str) -> Optional[int]:
-    """Return 1-based line number of the first line matching regex pattern (best-effort)."""
-    if not text:
+    Falls back to the run block's first line when no pattern matches the raw
+    source (e.g. escapes inside a quoted scalar).
+    """
+    run = step.run
+    if run is None:
         return None
-    rx = re.compile(pattern)
-    for i, line in enumerate(text.splitlines(), start=1):
-        if rx.search(line):
-            return i
-    return None
+    idx = wf.source_index
+    if idx is not None and run.span is not None:
+        start, end = run.span
+        for rx in patterns:
+            line = idx.search_line(rx, start, end)
+            if line is not None:
+                return line
+    return run.location.start_line if run.location else None
@@ -1,8 +1,17 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, TextIO
 from datetime import datetime, timezone
 
+SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+
+# GitHub code scanning accepts at most 25k results per run and rejects large uploads.
+DEFAULT_MAX_RESULTS = 25_000
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+
 
 def _sarif_level(status: str, severity: str) -> str:
     # SARIF levels: none, note, warning, error
@@ -26,66 +35,84 @@ def _markdown_explain(explain: Dict[str, Any]) -> str:
     return "\n\n".join(parts)
 
 
+def _rule_id(f: Dict[str, Any]) -> str:
+    return f.get("rule_id") or f.get("control_id") or "UNKNOWN"
+
+
+def _sarif_rule(f: Dict[str, Any]) -> Dict[str, Any]:
+    control_id = f.get("control_id") or "UNKNOWN"
+    md_explain = _markdown_explain(f.get("explain") or {})
+    return {
+        "id": _rule_id(f),
+        "name": control_id,
+        "shortDescription": {"text": f"{control_id}"},
+        "fullDescription": {"text": f"{control_id}"},
+        "help": {"text": md_explain, "markdown": md_explain},
+        "properties": {
+            "controlId": control_id,
+        },
+    }
+
+
+def _sarif_result(f: Dict[str, Any]) -> Dict[str, Any]:
+    control_id = f.get("control_id") or "UNKNOWN"
+    status = f.get("status") or "WARN"
+    severity = f.get("severity") or "Medium"
+
+    file_path = f.get("file_path") or ""
+    start_line = f.get("start_line")
+    end_line = f.get("end_line")
+
+    location: Dict[str, Any] = {
+        "physicalLocation": {
+            "artifactLocation": {"uri": file_path},
+        }
+    }
+    if isinstance(start_line, int):
+        region = {"startLine": start_line}
+        if isinstance(end_line, int):
+            region["endLine"] = end_line
+        location["physicalLocation"]["region"] = region
+
+    # The full why/fix/verify text lives once in the rule's help; results only keep
+    # the per-instance evidence.
+    message = f.get("message") or ""
+    detect = (f.get("explain") or {}).get("detect")
+    if detect:
+        message = f"{message}\n\n**Detect**: {detect}"
+
+    return {
+        "ruleId": _rule_id(f),
+        "level": _sarif_level(status, severity),
+        "message": {"text": message},
+        "locations": [location],
+        "properties": {
+            "status": status,
+            "severity": severity,
+            "controlId": control_id,
+            "metadata": f.get("metadata") or {},
+        },
+    }
+
+
+def _utc_now() -> str:
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
 def findings_to_sarif(findings: List[Dict[str, Any]], *, tool_name: str = "gh-actions-security-scanner", tool_version: str = "0.1.0") -> Dict[str, Any]:
     # Build a minimal SARIF v2.1.0 document compatible with GitHub Code Scanning.
     rules = {}
     results = []
 
     for f in findings:
-        rule_id = f.get("rule_id") or f.get("control_id") or "UNKNOWN"
-        control_id = f.get("control_id") or "UNKNOWN"
-        status = f.get("status") or "WARN"
-        severity = f.get("severity") or "Medium"
-        level = _sarif_level(status, severity)
-
+        rule_id = _rule_id(f)
         # Add rule metadata once
         if rule_id not in rules:
-            rules[rule_id] = {
-                "id": rule_id,
-                "name": control_id,
-                "shortDescription": {"text": f"{control_id}"},
-                "fullDescription": {"text": f"{control_id}"},
-                "help": {"text": _markdown_explain(f.get("explain") or {})},
-                "properties": {
-                    "controlId": control_id,
-                },
-            }
-
-        file_path = f.get("file_path") or ""
-        start_line = f.get("start_line")
-        end_line = f.get("end_line")
-
-        location = {
-            "physicalLocation": {
-                "artifactLocation": {"uri": file_path},
-            }
-        }
-        if isinstance(start_line, int):
-            region = {"startLine": start_line}
-            if isinstance(end_line, int):
-                region["endLine"] = end_line
-            location["physicalLocation"]["region"] = region
-
-        message = f.get("message") or ""
-        md_explain = _markdown_explain(f.get("explain") or {})
-        if md_explain:
-            message = f"{message}\n\n{md_explain}"
-
-        results.append({
-            "ruleId": rule_id,
-            "level": level,
-            "message": {"text": message},
-            "locations": [location],
-            "properties": {
-                "status": status,
-                "severity": severity,
-                "controlId": control_id,
-                "metadata": f.get("metadata") or {},
-            },
-        })
+            rules[rule_id] = _sarif_rule(f)
+        results.append(_sarif_result(f))
 
     sarif = {
-        "$schema": "https://json.schemastore.org/sarif-2.1.0.json",
+        "$schema": SARIF_SCHEMA,
         "version": "2.1.0",
         "runs": [{
             "tool": {
@@ -101,8 +128,149 @@ def findings_to_sarif(findings: List[Dict[str, Any]], *, tool_name: str = "gh-ac
             },
             "invocations": [{
                 "executionSuccessful": True,
-                "endTimeUtc": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+                "endTimeUtc": _utc_now(),
             }],
         }],
     }
     return sarif
+
+
+class SarifWriter:
+    """Streams findings into one or more SARIF files without holding the document in memory.
+
+    Results are written as they arrive; rules (with their help text) are written
+    once per file after its results. When a file would exceed `max_results` or
+    `max_bytes`, it is closed and the next shard is started: `out.sarif`,
+    `out-2.sarif`, `out-3.sarif`, ... Each shard is a complete single-run SARIF
+    document with its own automation id so GitHub treats shards as separate
+    categories. Without `out_path`, a single unsharded document goes to stdout.
+
+    As a context manager, an exception closes the open shard and removes the
+    partly written files; a normal exit finishes the document like `close()`.
+    """
+
+    def __init__(
+        self,
+        out_path: Optional[str],
+        *,
+        tool_name: str = "gh-actions-security-scanner",
+        tool_version: str = "0.1.0",
+        max_results: int = DEFAULT_MAX_RESULTS,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ) -> None:
+        self.out_path = Path(out_path) if out_path else None
+        self.tool_name = tool_name
+        self.tool_version = tool_version
+        self.max_results = max_results
+        self.max_bytes = max_bytes
+        self.paths: List[Path] = []
+
+        self._fh: Optional[TextIO] = None
+        self._closed = False
+        self._rules: Dict[str, str] = {}
+        self._count = 0
+        self._bytes = 0
+        self._rules_bytes = 0
+
+    def _shard_path(self, n: int) -> Path:
+        assert self.out_path is not None
+        if n == 1:
+            return self.out_path
+        return self.out_path.with_name(f"{self.out_path.stem}-{n}{self.out_path.suffix}")
+
+    def _open(self) -> None:
+        n = len(self.paths) + 1
+        if self.out_path is None:
+            self._fh = sys.stdout
+        else:
+            p = self._shard_path(n)
+            self.paths.append(p)
+            self._fh = open(p, "w", encoding="utf-8")
+        self._rules = {}
+        self._count = 0
+        self._rules_bytes = 0
+        self._bytes = self._write(
+            '{"$schema": %s, "version": "2.1.0", "runs": [{"results": [' % json.dumps(SARIF_SCHEMA)
+        )
+
+    def _write(self, text: str) -> int:
+        assert self._fh is not None
+        self._fh.write(text)
+        return len(text)  # json.dumps output is ASCII, so characters == bytes
+
+    def _close(self) -> None:
+        if self._fh is None:
+            return
+        n = len(self.paths) or 1
+        automation_id = self.tool_name if n == 1 else f"{self.tool_name}/{n}"
+        driver = '{"name": %s, "version": %s, "rules": [%s]}' % (
+            json.dumps(self.tool_name),
+            json.dumps(self.tool_version),
+            ", ".join(self._rules.values()),
+        )
+        self._write('], "tool": {"driver": %s}, "automationDetails": %s, "invocations": %s}]}\n' % (
+            driver,
+            json.dumps({"id": automation_id}),
+            json.dumps([{"executionSuccessful": True, "endTimeUtc": _utc_now()}]),
+        ))
+        if self._fh is sys.stdout:
+            self._fh.flush()
+        else:
+            self._fh.close()
+        self._fh = None
+
+    def add(self, finding: Dict[str, Any]) -> None:
+        result = json.dumps(_sarif_result(finding))
+        rule_id = _rule_id(finding)
+        # The rule this result would add to the shard counts toward its size too.
+        rule = json.dumps(_sarif_rule(finding)) if rule_id not in self._rules else None
+        added = len(result) + 2 + (len(rule) + 2 if rule is not None else 0)
+
+        if self._fh is None:
+            self._open()
+        elif self.out_path is not None and self._count and (
+            self._count >= self.max_results
+            or self._bytes + self._rules_bytes + added + 1024 > self.max_bytes
+        ):
+            self._close()
+            self._open()
+
+        if rule_id not in self._rules:
+            if rule is None:
+                rule = json.dumps(_sarif_rule(finding))
+            self._rules[rule_id] = rule
+            self._rules_bytes += len(rule) + 2
+
+        self._bytes += self._write((", " if self._count else "") + result)
+        self._count += 1
+
+    def close(self) -> List[Path]:
+        """Finish the current document (an empty one if nothing was added). Returns shard paths."""
+        if self._closed:
+            return self.paths
+        if self._fh is None and not self.paths:
+            self._open()
+        self._close()
+        self._closed = True
+        return self.paths
+
+    def abort(self) -> None:
+        """Close the open shard without finishing it and delete every shard written so far."""
+        self._closed = True
+        fh, self._fh = self._fh, None
+        if fh is not None and fh is not sys.stdout:
+            fh.close()
+        for p in self.paths:
+            try:
+                p.unlink()
+            except OSError:
+                pass
+
+    def __enter__(self) -> "SarifWriter":
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
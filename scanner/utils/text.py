@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import re
+from functools import lru_cache
 from typing import Literal
 
 RefType = Literal["sha", "tag", "branch", "unknown"]
@@ -11,6 +12,7 @@ _SEMVER_TAG_RE = re.compile(r"^v?\d+(?:\.\d+){0,2}(?:[-+][0-9A-Za-z.-]+)?$")
 _BRANCH_LIKELY = {"main", "master", "develop", "dev", "trunk", "head", "latest"}
 
 
+@lru_cache(maxsize=4096)
 def classify_ref_type(ref: str) -> RefType:
     r = ref.strip()
     if _SHA40_RE.match(r):
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Sequence, Tuple
+
+from .controls.base import Control
+from .engine import policy_for_level, run_policies
+from .ir.cache import IR_CACHE
+from .policy.compiled import CompiledPolicy
+from .policy.presets import PRESET_NAMES, get_preset_policy
+
+STATUSES = ("FAIL", "WARN", "PASS", "SKIP")
+
+# (control_id, status) -> count, per policy name
+FileTally = Dict[str, Counter[Tuple[str, str]]]
+
+
+def candidate_policies(
+    level: str,
+    presets: Sequence[str],
+    custom: Mapping[str, Dict[str, Any]] | None = None,
+) -> Dict[str, CompiledPolicy]:
+    """Compile named candidates: presets merged on the level defaults, then custom policy overrides.
+
+    Raises ValueError when a custom candidate is named like a preset, which would
+    otherwise replace (or pass for) that preset in the matrix.
+    """
+    clashes = sorted(set(custom or {}) & set(PRESET_NAMES))
+    if clashes:
+        raise ValueError(
+            f"Custom policy name(s) {clashes} collide with preset names; choose different names."
+        )
+    out: Dict[str, CompiledPolicy] = {}
+    for name in presets:
+        out[name] = CompiledPolicy.from_dict(policy_for_level(level, get_preset_policy(level, name)))
+    for name, override in (custom or {}).items():
+        out[name] = CompiledPolicy.from_dict(policy_for_level(level, override))
+    return out
+
+
+def whatif_text(
+    file_path: str,
+    text: str,
+    controls: Sequence[Control],
+    policies: Mapping[str, CompiledPolicy],
+) -> FileTally:
+    """Parse and derive one workflow once, then tally findings under every candidate policy."""
+    wf = IR_CACHE.load(file_path, text)
+    results = run_policies(wf, controls, policies)
+    return {name: Counter((f.control_id, f.status) for f in fs) for name, fs in results.items()}
+
+
+@dataclass
+class PolicyTally:
+    name: str
+    status_counts: Counter[str] = field(default_factory=Counter)
+    fail_by_control: Counter[str] = field(default_factory=Counter)
+    files_failing: int = 0
+
+
+class WhatIfReport:
+    """Accumulates per-file tallies and renders the per-policy delta table."""
+
+    def __init__(self, level: str, names: Sequence[str], baseline: str | None = None) -> None:
+        self.level = level
+        self.names = list(names)
+        self.baseline = baseline or self.names[0]
+        self.files = 0
+        self.tallies = {n: PolicyTally(n) for n in self.names}
+
+    def add(self, tally: FileTally) -> None:
+        self.files += 1
+        for name, counts in tally.items():
+            t = self.tallies[name]
+            failed = False
+            for (control_id, status), n in counts.items():
+                t.status_counts[status] += n
+                if status == "FAIL":
+                    t.fail_by_control[control_id] += n
+                    failed = True
+            if failed:
+                t.files_failing += 1
+
+    def rows(self) -> List[Dict[str, Any]]:
+        base = self.tallies[self.baseline]
+        rows: List[Dict[str, Any]] = []
+        for name in self.names:
+            t = self.tallies[name]
+            controls = sorted(set(t.fail_by_control) | set(base.fail_by_control))
+            changed = {
+                c: t.fail_by_control[c] - base.fail_by_control[c]
+                for c in controls
+                if t.fail_by_control[c] != base.fail_by_control[c]
+            }
+            rows.append({
+                "policy": name,
+                **{s: t.status_counts[s] for s in STATUSES},
+                "files_failing": t.files_failing,
+                "delta_fail": t.status_counts["FAIL"] - base.status_counts["FAIL"],
+                "delta_warn": t.status_counts["WARN"] - base.status_counts["WARN"],
+                "delta_files_failing": t.files_failing - base.files_failing,
+                "fail_delta_by_control": changed,
+            })
+        return rows
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"level": self.level, "baseline": self.baseline, "files": self.files, "policies": self.rows()}
+
+    def format_table(self) -> str:
+        header = ["policy", *STATUSES, "files_failing", "dFAIL", "dWARN", "dfiles", "FAIL delta by control"]
+        body = []
+        for r in self.rows():
+            by_control = " ".join(f"{c}:{d:+d}" for c, d in r["fail_delta_by_control"].items()) or "-"
+            body.append([
+                r["policy"], *(str(r[s]) for s in STATUSES), str(r["files_failing"]),
+                f"{r['delta_fail']:+d}", f"{r['delta_warn']:+d}", f"{r['delta_files_failing']:+d}", by_control,
+            ])
+        widths = [max(len(row[i]) for row in [header, *body]) for i in range(len(header) - 1)]
+        lines = [f"level={self.level} files={self.files} baseline={self.baseline}"]
+        for row in [header, *body]:
+            cells = [row[0].ljust(widths[0])] + [c.rjust(w) for c, w in zip(row[1:-1], widths[1:])]
+            lines.append("  ".join(cells + [row[-1]]))
+        return "\n".join(lines)
@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+TEST_DIR = Path(__file__).resolve().parent
+FIXTURE_DIRS = [TEST_DIR / "scan-test-cases", TEST_DIR / "workflows"]
+WORKFLOW_FILES = sorted(p for d in FIXTURE_DIRS for p in d.glob("*.yml"))
+
+
+@pytest.fixture(params=WORKFLOW_FILES, ids=lambda p: f"{p.parent.name}/{p.name}")
+def workflow_file(request: pytest.FixtureRequest) -> Path:
+    """Every workflow fixture shipped under test/scan-test-cases and test/workflows."""
+    return request.param
+
+
+@pytest.fixture
+def client(monkeypatch: pytest.MonkeyPatch):
+    """Flask test client; scans run in the request thread (no worker pool)."""
+    from web.app import create_app
+
+    monkeypatch.setenv("SCAN_WORKERS", "1")
+    app = create_app()
+    app.config["TESTING"] = True
+    return app.test_client()
@@ -0,0 +1,83 @@
+"""On-disk scan result cache: keys, hits, path rewriting, atomic writes and pruning."""
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from scanner import cache as cache_mod
+from scanner.cache import ScanCache, code_fingerprint
+from scanner.findings import Finding
+
+TEXT = "on: push\njobs: {}\n"
+
+
+def _finding(path: str = "a.yml") -> Finding:
+    return Finding(
+        control_id="L1-01", status="FAIL", severity="High", message="m", file_path=path,
+        start_line=3, end_line=4, rule_id="L1-01.R1", explain={"why": "w"}, metadata={"k": 1},
+    )
+
+
+def test_miss_then_hit_rewrites_path(tmp_path: Path) -> None:
+    c = ScanCache(tmp_path)
+    key = ScanCache.key(TEXT, "L1", None)
+    assert c.get(key, "a.yml") is None
+    c.put(key, [_finding("a.yml")])
+    (hit,) = c.get(key, "moved/b.yml")
+    assert hit == _finding("moved/b.yml")
+    assert not list(tmp_path.rglob("*.tmp"))
+
+
+def test_key_changes_with_inputs() -> None:
+    base = ScanCache.key(TEXT, "L1", None)
+    assert ScanCache.key(TEXT, "l1", None) == base
+    assert ScanCache.key(TEXT + "\n", "L1", None) != base
+    assert ScanCache.key(TEXT, "L2", None) != base
+    assert ScanCache.key(TEXT, "L1", {"forbid_set_x": True}) != base
+    assert ScanCache.key(TEXT, "L1", None, controls=["L1-01"]) != base
+    assert ScanCache.key(TEXT, "L1", None, skip_controls=["L1-01"]) != base
+
+
+def test_key_changes_with_code_fingerprint(monkeypatch: pytest.MonkeyPatch) -> None:
+    base = ScanCache.key(TEXT, "L1", None)
+    assert len(code_fingerprint()) == 64
+    monkeypatch.setattr(cache_mod, "code_fingerprint", lambda: "other-build")
+    assert ScanCache.key(TEXT, "L1", None) != base
+
+
+def test_corrupt_entry_is_a_miss(tmp_path: Path) -> None:
+    c = ScanCache(tmp_path)
+    key = ScanCache.key(TEXT, "L1", None)
+    c.put(key, [_finding()])
+    c._entry_path(key).write_text("{not json", encoding="utf-8")
+    assert c.get(key, "a.yml") is None
+
+
+def test_failed_write_leaves_no_temp_file(tmp_path: Path) -> None:
+    c = ScanCache(tmp_path)
+    key = ScanCache.key(TEXT, "L1", None)
+    bad = _finding()
+    bad.metadata = {"k": object()}  # not JSON serializable
+    c.put(key, [bad])
+    assert c.get(key, "a.yml") is None
+    assert not list(tmp_path.rglob("*.tmp"))
+
+
+def test_prune_evicts_least_recently_used(tmp_path: Path) -> None:
+    c = ScanCache(tmp_path)
+    keys = [ScanCache.key(f"{TEXT}# {i}\n", "L1", None) for i in range(3)]
+    for i, key in enumerate(keys):
+        c.put(key, [_finding()])
+        os.utime(c._entry_path(key), (1000 + i, 1000 + i))
+    c.get(keys[0], "a.yml")  # touch: now the most recently used
+    size = c._entry_path(keys[0]).stat().st_size
+
+    c.max_bytes = size * 2
+    assert c.prune() == 1
+    assert c.get(keys[1], "a.yml") is None
+    assert c.get(keys[0], "a.yml") is not None
+    assert c.get(keys[2], "a.yml") is not None
+    assert json.loads(c._entry_path(keys[2]).read_text(encoding="utf-8"))[0]["status"] == "FAIL"
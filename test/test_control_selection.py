@@ -0,0 +1,102 @@
+"""Control selection by ID or glob: engine, CLI and API."""
+from __future__ import annotations
+
+import io
+import json
+from pathlib import Path
+
+import pytest
+
+from scanner.cli import main
+from scanner.engine import controls_for_level, derivations_for, parse_control_patterns, scan_workflow_levels, select_controls
+
+CASES = Path(__file__).resolve().parent / "scan-test-cases"
+WORKFLOW = (CASES / "case-l1-02-broad-write.yml").read_text(encoding="utf-8")
+
+
+def _ids(controls) -> list:
+    return [c.control_id for c in controls]
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        (None, None),
+        ("", None),
+        ("l1-01, L1-02,,l1-01", ("L1-01", "L1-02")),
+        (["l2-*", " L1-05 "], ("L2-*", "L1-05")),
+    ],
+)
+def test_parse_control_patterns(value, expected) -> None:
+    assert parse_control_patterns(value) == expected
+
+
+def test_select_by_id_and_glob() -> None:
+    l3 = controls_for_level("L3")
+    assert _ids(select_controls(l3, ["L1-01", "L1-02"])) == ["L1-01", "L1-02"]
+    assert _ids(select_controls(l3, ["l2-*"])) == ["L2-07", "L2-09"]
+    assert _ids(select_controls(l3, ["L1-0[12]"])) == ["L1-01", "L1-02"]
+    assert _ids(select_controls(l3)) == _ids(l3)
+
+
+def test_skip_controls() -> None:
+    l3 = controls_for_level("L3")
+    assert _ids(select_controls(l3, skip=["L1-*"])) == ["L2-07", "L2-09"]
+    assert _ids(select_controls(l3, ["L1-*"], ["L1-05", "L1-03"])) == ["L1-01", "L1-02", "L1-04"]
+
+
+def test_pattern_valid_at_another_level_selects_nothing() -> None:
+    assert select_controls(controls_for_level("L1"), ["L2-07"]) == []
+
+
+@pytest.mark.parametrize("only, skip", [(["L9-99"], None), (None, ["nope*"]), (["L1-01", "L1-1*"], None)])
+def test_unknown_pattern_is_rejected(only, skip) -> None:
+    with pytest.raises(ValueError, match="Unknown control"):
+        select_controls(controls_for_level("L3"), only, skip)
+
+
+def test_derivations_shrink_with_selection() -> None:
+    l3 = controls_for_level("L3")
+    assert set(derivations_for(select_controls(l3, ["L1-02"]))) <= set(derivations_for(l3))
+
+
+def test_scan_runs_only_selected_controls() -> None:
+    by_level = scan_workflow_levels("wf.yml", WORKFLOW, {"L2": None}, controls=["L1-*"], skip_controls=["L1-05"])
+    assert sorted({f.control_id for f in by_level["L2"]}) == ["L1-01", "L1-02", "L1-03", "L1-04"]
+
+
+def test_cli_controls(tmp_path: Path) -> None:
+    out = tmp_path / "out.json"
+    argv = ["scan", str(CASES / "case-l1-02-broad-write.yml"), "--no-cache", "--out", str(out)]
+    main([*argv, "--controls", "L1-01,L1-02", "--skip-controls", "L1-01"])
+    assert {f["control_id"] for f in json.loads(out.read_text(encoding="utf-8"))["findings"]} == {"L1-02"}
+
+
+def test_cli_unknown_control(capsys: pytest.CaptureFixture[str]) -> None:
+    with pytest.raises(SystemExit) as exc:
+        main(["scan", str(CASES), "--controls", "L1-99"])
+    assert exc.value.code == 2
+    assert "Unknown control 'L1-99'" in capsys.readouterr().err
+
+
+def test_api_controls(client) -> None:
+    r = client.post("/api/scan", json={"workflow": WORKFLOW, "level": "L2", "controls": ["L2-*", "L1-02"]})
+    assert r.status_code == 200
+    assert {f["control_id"] for f in r.get_json()["findings"]} == {"L1-02", "L2-07", "L2-09"}
+
+    r = client.post("/api/scan", json={"workflow": WORKFLOW, "skip_controls": "L1-0*"})
+    assert r.status_code == 200
+    assert r.get_json()["findings"] == []
+
+    r = client.post("/api/scan/file", data={
+        "file": (io.BytesIO(WORKFLOW.encode("utf-8")), "wf.yml"), "controls": "L1-01",
+    }, content_type="multipart/form-data")
+    assert r.status_code == 200
+    assert {f["control_id"] for f in r.get_json()["findings"]} == {"L1-01"}
+
+
+@pytest.mark.parametrize("field, value", [("controls", "L1-99"), ("skip_controls", ["x*"]), ("controls", 5)])
+def test_api_rejects_bad_selection(client, field, value) -> None:
+    r = client.post("/api/scan", json={"workflow": WORKFLOW, field: value})
+    assert r.status_code == 400
+    assert r.get_json()["error"] == "invalid_request"
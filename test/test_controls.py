@@ -0,0 +1,30 @@
+"""Control API: standalone evaluation and default SKIP findings."""
+from __future__ import annotations
+
+from pathlib import Path
+
+from scanner.controls.base import Control
+from scanner.engine import controls_for_level, policy_for_level
+from scanner.ir.derivation import derive_workflow
+from scanner.ir.parser import parse_workflow_yaml
+from scanner.policy.compiled import CompiledPolicy
+
+
+def test_evaluate_accepts_policy_dict(workflow_file: Path) -> None:
+    wf = derive_workflow(parse_workflow_yaml(str(workflow_file), workflow_file.read_text(encoding="utf-8")))
+    raw = policy_for_level("L3")
+    compiled = CompiledPolicy.from_dict(raw)
+    for control in controls_for_level("L3"):
+        assert control.evaluate(wf, raw) == control.evaluate(wf, compiled)
+
+
+def test_default_skip_finding() -> None:
+    class Never(Control):
+        control_id = "X-01"
+
+        def applies_to(self, index):
+            return False
+
+    wf = derive_workflow(parse_workflow_yaml("a.yml", "on: push\njobs: {}\n"))
+    (f,) = Never().evaluate(wf, None)
+    assert (f.control_id, f.status, f.rule_id, f.file_path) == ("X-01", "SKIP", "X-01.R0", "a.yml")
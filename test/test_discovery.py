@@ -0,0 +1,126 @@
+"""Single-walk workflow discovery: ignore rules, pruning and symlinks."""
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from scanner.utils.discovery import Discovery, compile_ignore
+
+WF = "on: push\njobs:\n  b:\n    runs-on: ubuntu-latest\n    steps:\n      - uses: {uses}\n"
+ACTION = "name: a\nruns:\n  using: composite\n  steps: []\n"
+
+
+def _write(root: Path, rel: str, text: str = "a: 1\n") -> Path:
+    p = root / rel
+    p.parent.mkdir(parents=True, exist_ok=True)
+    p.write_text(text, encoding="utf-8")
+    return p
+
+
+def _rel(root: Path, paths: List[Path]) -> List[str]:
+    return sorted(p.relative_to(root).as_posix() for p in paths)
+
+
+@pytest.mark.parametrize(
+    "pattern, path, matches",
+    [
+        ("*.yml", "a/b/c.yml", True),
+        ("/top.yml", "top.yml", True),
+        ("/top.yml", "sub/top.yml", False),
+        ("docs/*.yml", "docs/a.yml", True),
+        ("docs/*.yml", "docs/x/a.yml", False),
+        ("**/gen/**", "a/gen/b/c.yml", True),
+        ("file-[0-9].yml", "file-7.yml", True),
+        ("file-[!0-9].yml", "file-7.yml", False),
+    ],
+)
+def test_compile_ignore(pattern: str, path: str, matches: bool) -> None:
+    (rule,) = compile_ignore([pattern])
+    assert bool(rule.regex.fullmatch(path)) is matches
+
+
+def test_gitignore_exclude_and_include(tmp_path: Path) -> None:
+    _write(tmp_path, ".gitignore", "build/\n*.gen.yml\n!keep.gen.yml\n")
+    _write(tmp_path, "a.yml")
+    _write(tmp_path, "x.gen.yml")
+    _write(tmp_path, "keep.gen.yml")
+    _write(tmp_path, "build/b.yml")
+    _write(tmp_path, "sub/.gitignore", "local.yml\n")
+    _write(tmp_path, "sub/local.yml")
+    _write(tmp_path, "local.yml")
+    _write(tmp_path, "vendor/v.yml")
+    _write(tmp_path, "notes.txt")
+
+    assert _rel(tmp_path, Discovery().collect(tmp_path)) == [
+        "a.yml", "keep.gen.yml", "local.yml", "vendor/v.yml",
+    ]
+    assert _rel(tmp_path, Discovery(exclude=["vendor/"]).collect(tmp_path)) == ["a.yml", "keep.gen.yml", "local.yml"]
+    assert _rel(tmp_path, Discovery(include=["vendor/**"]).collect(tmp_path)) == ["vendor/v.yml"]
+    assert "build/b.yml" in _rel(tmp_path, Discovery(use_gitignore=False).collect(tmp_path))
+
+
+def test_prune_dirs_are_not_walked(tmp_path: Path) -> None:
+    _write(tmp_path, "a.yml")
+    _write(tmp_path, "node_modules/dep/x.yml")
+    _write(tmp_path, ".git/config.yml")
+    d = Discovery()
+    assert _rel(tmp_path, d.collect(tmp_path)) == ["a.yml"]
+    assert d.stats.pruned == 2
+    assert d.stats.dirs == 1
+
+
+def test_unreadable_gitignore_is_skipped(tmp_path: Path) -> None:
+    (tmp_path / ".gitignore").mkdir()  # opening it raises IsADirectoryError
+    _write(tmp_path, "a.yml")
+    assert _rel(tmp_path, Discovery().collect(tmp_path)) == ["a.yml"]
+
+
+def test_workflows_only_prunes_and_follows_local_uses(tmp_path: Path) -> None:
+    _write(tmp_path, ".github/workflows/ci.yml", WF.format(uses="./tools/setup"))
+    _write(tmp_path, ".github/workflows/nested/ignored.yml", WF.format(uses="actions/checkout@v4"))
+    _write(tmp_path, ".github/actions/lint/action.yml", ACTION)
+    _write(tmp_path, ".github/dependabot.yml")
+    _write(tmp_path, "tools/setup/action.yml", ACTION.replace("steps: []", "steps:\n    - uses: ./tools/inner"))
+    _write(tmp_path, "tools/inner/action.yaml", ACTION)
+    _write(tmp_path, "tools/unused/action.yml", ACTION)
+    _write(tmp_path, "action.yml", ACTION)
+    _write(tmp_path, "packages/p/config.yml")
+
+    d = Discovery(workflows_only=True)
+    assert _rel(tmp_path, d.collect(tmp_path)) == [
+        ".github/actions/lint/action.yml",
+        ".github/workflows/ci.yml",
+        "action.yml",
+        "tools/inner/action.yaml",
+        "tools/setup/action.yml",
+    ]
+    # packages/ and tools/ at the root and .github/workflows/nested are never walked.
+    assert d.stats.pruned == 3
+
+
+def test_select_matches_collect(tmp_path: Path) -> None:
+    _write(tmp_path, ".gitignore", "gen/\n")
+    _write(tmp_path, ".github/workflows/ci.yml", WF.format(uses="actions/checkout@v4"))
+    _write(tmp_path, "tools/unused/action.yml", ACTION)
+    _write(tmp_path, "gen/x.yml")
+    _write(tmp_path, "a.yml")
+    every = [p for p in tmp_path.rglob("*.yml")]
+    for d in (Discovery(), Discovery(workflows_only=True), Discovery(exclude=["a.yml"])):
+        assert _rel(tmp_path, d.select(tmp_path, every)) == _rel(tmp_path, d.collect(tmp_path))
+
+
+@pytest.mark.skipif(not hasattr(os, "symlink"), reason="no symlink support")
+def test_symlinks(tmp_path: Path) -> None:
+    outside = tmp_path / "outside"
+    _write(outside, "linked-dir/x.yml")
+    _write(outside, "target.yml")
+    root = tmp_path / "root"
+    _write(root, "a.yml")
+    (root / "dir-link").symlink_to(outside / "linked-dir", target_is_directory=True)
+    (root / "file-link.yml").symlink_to(outside / "target.yml")
+    (root / "dangling.yml").symlink_to(outside / "missing.yml")
+    # Symlinked files are scanned; symlinked directories and dangling links are not followed.
+    assert _rel(root, Discovery().collect(root)) == ["a.yml", "file-link.yml"]
@@ -0,0 +1,93 @@
+"""--changed-since: changed-file listing and propagation through local `uses:`."""
+from __future__ import annotations
+
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from scanner.cli import main
+from scanner.utils.git import changed_files, select_changed_workflows
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git not installed")
+
+WORKFLOW = "on: push\njobs:\n  b:\n    runs-on: ubuntu-latest\n    steps:\n      - uses: {uses}\n"
+
+
+def _git(root: Path, *args: str) -> None:
+    subprocess.run(
+        ["git", "-c", "user.name=t", "-c", "user.email=t@example.com", *args],
+        cwd=root, check=True, capture_output=True,
+    )
+
+
+def _write(root: Path, rel: str, text: str) -> Path:
+    p = root / rel
+    p.parent.mkdir(parents=True, exist_ok=True)
+    p.write_text(text, encoding="utf-8")
+    return p
+
+
+@pytest.fixture
+def repo(tmp_path: Path) -> Path:
+    _git(tmp_path, "init", "-q")
+    _write(tmp_path, ".github/actions/setup/action.yml", "name: setup\nruns:\n  using: composite\n  steps: []\n")
+    _write(tmp_path, ".github/workflows/reusable.yml", WORKFLOW.format(uses="./.github/actions/setup"))
+    _write(tmp_path, ".github/workflows/caller.yml", WORKFLOW.format(uses="./.github/workflows/reusable.yml"))
+    _write(tmp_path, ".github/workflows/plain.yml", WORKFLOW.format(uses="actions/checkout@v4"))
+    _git(tmp_path, "add", "-A")
+    _git(tmp_path, "commit", "-qm", "init")
+    return tmp_path.resolve()
+
+
+def _names(paths) -> list:
+    return sorted(p.name for p in paths)
+
+
+def test_nothing_changed(repo: Path) -> None:
+    assert changed_files(repo, "HEAD") == set()
+    assert select_changed_workflows(repo, "HEAD") == []
+
+
+def test_modified_file(repo: Path) -> None:
+    _write(repo, ".github/workflows/plain.yml", WORKFLOW.format(uses="actions/checkout@v5"))
+    assert changed_files(repo, "HEAD") == {repo / ".github/workflows/plain.yml"}
+    assert _names(select_changed_workflows(repo, "HEAD")) == ["plain.yml"]
+
+
+def test_untracked_file(repo: Path) -> None:
+    _write(repo, ".github/workflows/new.yml", WORKFLOW.format(uses="actions/checkout@v4"))
+    assert _names(select_changed_workflows(repo, "HEAD")) == ["new.yml"]
+    # Untracked files are not commits.
+    assert select_changed_workflows(repo, "HEAD", committed_only=True) == []
+
+
+def test_deleted_action_reaches_users(repo: Path) -> None:
+    _git(repo, "rm", "-rq", ".github/actions/setup")
+    assert repo / ".github/actions/setup/action.yml" in changed_files(repo, "HEAD")
+    assert _names(select_changed_workflows(repo, "HEAD")) == ["caller.yml", "reusable.yml"]
+
+
+def test_propagates_through_local_uses(repo: Path) -> None:
+    _write(repo, ".github/actions/setup/action.yml", "name: setup2\nruns:\n  using: composite\n  steps: []\n")
+    _git(repo, "commit", "-qam", "change action")
+    # action -> reusable.yml -> caller.yml; plain.yml is untouched.
+    selected = _names(select_changed_workflows(repo, "HEAD~1", committed_only=True))
+    assert selected == ["action.yml", "caller.yml", "reusable.yml"]
+
+
+def test_cli_applies_discovery_filters(repo: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    _write(repo, ".github/workflows/plain.yml", WORKFLOW.format(uses="actions/checkout@v5"))
+    _write(repo, "other/x.yml", WORKFLOW.format(uses="actions/checkout@v4"))
+    main(["scan", str(repo), "--changed-since", "HEAD", "--no-cache", "--workflows-only"])
+    out = capsys.readouterr().out
+    assert "plain.yml" in out
+    assert "x.yml" not in out
+
+
+def test_cli_reports_git_errors(repo: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    assert main(["scan", str(repo), "--changed-since", "nosuchref", "--no-cache"]) == 2
+    err = capsys.readouterr().err
+    assert "nosuchref" in err
+    assert "Traceback" not in err
@@ -0,0 +1,38 @@
+"""In-process IR cache: hits, relocation and IR the codec cannot store."""
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from scanner.ir import cache as ir_cache
+from scanner.ir.cache import IRCache
+
+
+def test_hit_is_relocated_copy(workflow_file: Path) -> None:
+    cache = IRCache(max_bytes=1024 * 1024)
+    text = workflow_file.read_text(encoding="utf-8")
+    first = cache.load("a.yml", text)
+    second = cache.load("b.yml", text)
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert second.file_path == "b.yml"
+    assert second is not first
+
+
+def test_unencodable_ir_is_returned_uncached(monkeypatch: pytest.MonkeyPatch) -> None:
+    def refuse(wf, **_):
+        raise ValueError("unmarshallable object")
+
+    monkeypatch.setattr(ir_cache, "encode_workflow", refuse)
+    cache = IRCache(max_bytes=1024 * 1024)
+    wf = cache.load("a.yml", "on: push\njobs: {}\n")
+    assert wf.file_path == "a.yml"
+    assert cache.stats()["entries"] == 0
+
+
+def test_invalid_size_env_falls_back(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("SCANNER_IR_CACHE_MB", "lots")
+    with pytest.warns(UserWarning):
+        assert ir_cache.max_bytes_from_env(2) == 2 * 1024 * 1024
+    monkeypatch.setenv("SCANNER_IR_CACHE_MB", "0.5")
+    assert ir_cache.max_bytes_from_env(2) == 512 * 1024
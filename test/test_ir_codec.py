@@ -0,0 +1,67 @@
+"""WorkflowIR binary codec round trips over the workflow fixtures."""
+from __future__ import annotations
+
+import pickle
+from pathlib import Path
+
+import pytest
+
+from scanner.engine import controls_for_level, policy_for_level, run_controls
+from scanner.ir.codec import MAGIC, decode_workflow, encode_workflow
+from scanner.ir.derivation import derive_workflow
+from scanner.ir.models import WorkflowIR
+from scanner.ir.parser import parse_workflow_yaml
+from scanner.policy.compiled import CompiledPolicy
+
+
+def _derived(path: Path) -> WorkflowIR:
+    return derive_workflow(parse_workflow_yaml(str(path), path.read_text(encoding="utf-8")))
+
+
+def _findings(wf: WorkflowIR) -> list:
+    policy = CompiledPolicy.from_dict(policy_for_level("L3"))
+    return [f.to_dict() for f in run_controls(wf, controls_for_level("L3"), policy)]
+
+
+def test_roundtrip_preserves_ir(workflow_file: Path) -> None:
+    wf = _derived(workflow_file)
+    assert decode_workflow(encode_workflow(wf)) == wf
+
+
+def test_roundtrip_preserves_findings(workflow_file: Path) -> None:
+    wf = _derived(workflow_file)
+    assert _findings(decode_workflow(encode_workflow(wf))) == _findings(wf)
+
+
+def test_pickle_goes_through_codec(workflow_file: Path) -> None:
+    wf = _derived(workflow_file)
+    assert pickle.loads(pickle.dumps(wf)) == wf
+
+
+def test_relocate_file_path(workflow_file: Path) -> None:
+    wf = _derived(workflow_file)
+    back = decode_workflow(encode_workflow(wf), file_path="moved.yml")
+    assert back.file_path == "moved.yml"
+    assert all(j.location is None or j.location.file_path == "moved.yml" for j in back.jobs)
+
+
+def test_without_source(workflow_file: Path) -> None:
+    back = decode_workflow(encode_workflow(_derived(workflow_file), include_source=False))
+    assert back.source_text is None
+    assert back.source_index is None
+
+
+def test_rejects_foreign_and_stale_data(workflow_file: Path) -> None:
+    blob = encode_workflow(_derived(workflow_file))
+    with pytest.raises(ValueError):
+        decode_workflow(b"nope" + blob[len(MAGIC):])
+    with pytest.raises(ValueError):
+        decode_workflow(MAGIC + bytes([blob[len(MAGIC)] + 1]) + blob[len(MAGIC) + 1:])
+
+
+def test_non_string_workflow_name() -> None:
+    # `name: 2024-01-01` loads as a date, which marshal cannot store.
+    wf = derive_workflow(parse_workflow_yaml("dated.yml", "name: 2024-01-01\non: push\njobs: {}\n"))
+    assert wf.name is None
+    assert decode_workflow(encode_workflow(wf)) == wf
+    assert pickle.loads(pickle.dumps(wf)) == wf
@@ -0,0 +1,73 @@
+"""Streaming SARIF writer: shard rollover and per-shard validity."""
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from scanner.utils.sarif import SarifWriter
+
+
+def _finding(i: int) -> dict:
+    return {
+        "control_id": f"C-{i % 5:02d}",
+        "rule_id": f"C-{i % 5:02d}.R1",
+        "status": "FAIL",
+        "severity": "High",
+        "message": f"finding {i}",
+        "file_path": "wf.yml",
+        "start_line": i + 1,
+        "explain": {"why": "x" * 400, "detect": f"line {i + 1}"},
+    }
+
+
+def test_single_shard(tmp_path: Path) -> None:
+    with SarifWriter(str(tmp_path / "out.sarif")) as w:
+        for i in range(3):
+            w.add(_finding(i))
+    assert w.paths == [tmp_path / "out.sarif"]
+    run = json.loads(w.paths[0].read_text(encoding="utf-8"))["runs"][0]
+    assert len(run["results"]) == 3
+    assert {r["id"] for r in run["tool"]["driver"]["rules"]} == {"C-00.R1", "C-01.R1", "C-02.R1"}
+
+
+def test_rollover_by_results(tmp_path: Path) -> None:
+    w = SarifWriter(str(tmp_path / "out.sarif"), max_results=4)
+    for i in range(10):
+        w.add(_finding(i))
+    paths = w.close()
+    assert [p.name for p in paths] == ["out.sarif", "out-2.sarif", "out-3.sarif"]
+    docs = [json.loads(p.read_text(encoding="utf-8")) for p in paths]
+    assert [len(d["runs"][0]["results"]) for d in docs] == [4, 4, 2]
+    assert [d["runs"][0]["automationDetails"]["id"] for d in docs] == [
+        "gh-actions-security-scanner", "gh-actions-security-scanner/2", "gh-actions-security-scanner/3",
+    ]
+    for d in docs:
+        # Every result's rule is defined in its own shard.
+        run = d["runs"][0]
+        assert {r["ruleId"] for r in run["results"]} <= {r["id"] for r in run["tool"]["driver"]["rules"]}
+
+
+def test_rollover_by_bytes_stays_under_limit(tmp_path: Path) -> None:
+    limit = 6000
+    w = SarifWriter(str(tmp_path / "out.sarif"), max_bytes=limit)
+    for i in range(40):
+        w.add(_finding(i))
+    paths = w.close()
+    assert len(paths) > 1
+    assert paths[1].name == "out-2.sarif"
+    total = 0
+    for p in paths:
+        assert p.stat().st_size <= limit
+        total += len(json.loads(p.read_text(encoding="utf-8"))["runs"][0]["results"])
+    assert total == 40
+
+
+def test_exception_removes_partial_shards(tmp_path: Path) -> None:
+    with pytest.raises(RuntimeError):
+        with SarifWriter(str(tmp_path / "out.sarif"), max_results=2) as w:
+            for i in range(5):
+                w.add(_finding(i))
+            raise RuntimeError("scan failed")
+    assert list(tmp_path.iterdir()) == []
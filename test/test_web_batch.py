@@ -0,0 +1,76 @@
+"""/api/scan/batch: request validation, per-item errors and parity with /api/scan."""
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from web import workers
+
+CASES = Path(__file__).resolve().parent / "scan-test-cases"
+WORKFLOWS = {p.name: p.read_text(encoding="utf-8") for p in sorted(CASES.glob("*.yml"))}
+
+
+def _items() -> list:
+    return [{"file_path": name, "workflow": text} for name, text in WORKFLOWS.items()]
+
+
+def test_items_match_single_scans(client) -> None:
+    r = client.post("/api/scan/batch", json={"level": "L2", "items": _items()})
+    assert r.status_code == 200
+    body = r.get_json()
+    assert (body["count"], body["errors"]) == (len(WORKFLOWS), 0)
+    for item in body["items"]:
+        single = client.post("/api/scan", json={
+            "level": "L2", "file_path": item["file_path"], "workflow": WORKFLOWS[item["file_path"]],
+        }).get_json()
+        assert item["findings"] == single["findings"]
+
+
+def test_invalid_items_are_reported_per_item(client) -> None:
+    items = [{"file_path": "ok.yml", "workflow": next(iter(WORKFLOWS.values()))}, {"file_path": "empty.yml", "workflow": " "}, "x"]
+    body = client.post("/api/scan/batch", json={"items": items}).get_json()
+    assert body["errors"] == 2
+    ok, empty, bad = body["items"]
+    assert "findings" in ok
+    assert (empty["file_path"], empty["error"]) == ("empty.yml", "invalid_item")
+    assert (bad["file_path"], bad["error"]) == (None, "invalid_item")
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        {},
+        {"items": []},
+        {"items": {"file_path": "a.yml"}},
+        {"items": [{"workflow": "on: push"}], "level": "L9"},
+        {"items": [{"workflow": "on: push"}], "policy_preset": "nope"},
+        {"items": [{"workflow": "on: push"}], "policy": ["not", "an", "object"]},
+        {"items": [{"workflow": "on: push"}], "controls": "L1-99"},
+    ],
+)
+def test_invalid_requests(client, payload) -> None:
+    r = client.post("/api/scan/batch", json=payload)
+    assert r.status_code == 400
+    assert r.get_json()["error"] in ("invalid_request", "policy_invalid")
+
+
+def test_max_batch_items(client) -> None:
+    client.application.config["MAX_BATCH_ITEMS"] = 2
+    r = client.post("/api/scan/batch", json={"items": _items()[:3]})
+    assert r.status_code == 400
+    assert "MAX_BATCH_ITEMS=2" in r.get_json()["message"]
+
+
+def test_worker_pool_matches_serial(monkeypatch: pytest.MonkeyPatch) -> None:
+    items = [(name, text, {"L1": None}, (None, None)) for name, text in WORKFLOWS.items()]
+    monkeypatch.setenv("SCAN_WORKERS", "1")
+    serial = list(workers.iter_scan_items(items))
+    monkeypatch.setenv("SCAN_WORKERS", "2")
+    try:
+        pooled = list(workers.iter_scan_items(items))
+    finally:
+        pool = workers._pool
+        if pool is not None:
+            workers._discard_pool(pool)
+    assert pooled == serial
@@ -0,0 +1,94 @@
+"""ETag / If-None-Match round trips and the response cache behind /api/scan."""
+from __future__ import annotations
+
+import io
+from pathlib import Path
+
+from web.response_cache import ResponseCache
+
+WORKFLOW = (Path(__file__).resolve().parent / "scan-test-cases" / "case-l1-01-tag.yml").read_text(encoding="utf-8")
+
+
+def _scan(client, headers=None, **body):
+    return client.post("/api/scan", json={"workflow": WORKFLOW, **body}, headers=headers or {})
+
+
+def _cache_stats(client) -> dict:
+    return client.get("/api/health").get_json()["response_cache"]
+
+
+def test_etag_round_trip(client) -> None:
+    first = _scan(client)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert etag
+
+    again = _scan(client, headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.get_data() == b""
+    assert again.headers["ETag"] == etag
+    assert _cache_stats(client)["not_modified"] == 1
+
+    stale = _scan(client, headers={"If-None-Match": '"something-else"'})
+    assert stale.status_code == 200
+    assert stale.get_data() == first.get_data()
+
+
+def test_repeat_is_served_from_cache(client) -> None:
+    first = _scan(client)
+    second = _scan(client)
+    assert second.get_data() == first.get_data()
+    assert second.headers["ETag"] == first.headers["ETag"]
+    stats = _cache_stats(client)
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+
+
+def test_etag_tracks_inputs(client) -> None:
+    base = _scan(client).headers["ETag"]
+    tags = {
+        base,
+        _scan(client, level="L2").headers["ETag"],
+        _scan(client, only_status=["FAIL"]).headers["ETag"],
+        _scan(client, policy_preset="strict").headers["ETag"],
+        _scan(client, rules_catalog=True).headers["ETag"],
+        _scan(client, file_path="other.yml").headers["ETag"],
+        client.post("/api/scan", json={"workflow": WORKFLOW + "\n# edited\n"}).headers["ETag"],
+    }
+    assert len(tags) == 7
+    assert _scan(client, headers={"If-None-Match": base}, level="L2").status_code == 200
+
+
+def test_scan_file_etag(client) -> None:
+    def upload(headers=None):
+        data = {"file": (io.BytesIO(WORKFLOW.encode("utf-8")), "ci.yml"), "level": "L1"}
+        return client.post("/api/scan/file", data=data, content_type="multipart/form-data", headers=headers or {})
+
+    first = upload()
+    assert first.status_code == 200
+    assert upload({"If-None-Match": first.headers["ETag"]}).status_code == 304
+
+
+def test_errors_carry_no_etag(client) -> None:
+    r = client.post("/api/scan", json={"workflow": ""})
+    assert r.status_code == 400
+    assert "ETag" not in r.headers
+
+
+def test_response_cache_evicts_lru() -> None:
+    cache = ResponseCache(max_bytes=10)
+    cache.put("a", b"12345")
+    cache.put("b", b"12345")
+    assert cache.get("a") == b"12345"
+    cache.put("c", b"12345")
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    cache.put("big", b"x" * 11)
+    assert cache.get("big") is None
+    assert cache.bytes == 10
+
+
+def test_response_cache_disabled() -> None:
+    cache = ResponseCache(max_bytes=0)
+    cache.put("a", b"1")
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,116 @@
+"""/api/jobs: lifecycle, admission limit, retention and TTL expiry."""
+from __future__ import annotations
+
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from web import jobs as jobs_mod
+from web.jobs import JobStore
+from web.routes import jobs as jobs_routes
+
+WORKFLOW = (Path(__file__).resolve().parent / "scan-test-cases" / "case-l1-01-tag.yml").read_text(encoding="utf-8")
+
+
+def _wait(client, job_id: str, status: str = "done") -> dict:
+    for _ in range(200):
+        body = client.get(f"/api/jobs/{job_id}").get_json()
+        if body.get("status") == status:
+            return body
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} never reached {status}")
+
+
+@pytest.fixture
+def gate(monkeypatch: pytest.MonkeyPatch):
+    """Jobs block inside their scan until the returned event is set."""
+    release = threading.Event()
+    real = jobs_routes.iter_scan_items
+
+    def blocking(tasks):
+        release.wait(5)
+        return real(tasks)
+
+    monkeypatch.setattr(jobs_routes, "iter_scan_items", blocking)
+    yield release
+    release.set()
+
+
+def test_job_lifecycle(client) -> None:
+    r = client.post("/api/jobs", json={"items": [{"file_path": "a.yml", "workflow": WORKFLOW}]})
+    assert r.status_code == 202
+    job = r.get_json()
+    assert r.headers["Location"] == job["links"]["self"]
+    done = _wait(client, job["job_id"])
+    assert (done["done"], done["total"]) == (1, 1)
+    assert done["expires_at"] is not None
+
+    result = client.get(job["links"]["result"])
+    assert result.status_code == 200
+    assert result.get_json()["items"][0]["file_path"] == "a.yml"
+    assert client.get("/api/jobs/nope").status_code == 404
+
+
+def test_running_job_result_is_409(client, gate) -> None:
+    job = client.post("/api/jobs", json={"workflow": WORKFLOW}).get_json()
+    r = client.get(f"/api/jobs/{job['job_id']}/result")
+    assert r.status_code == 409
+    assert r.get_json()["error"] == "job_not_finished"
+    gate.set()
+    _wait(client, job["job_id"])
+    assert client.get(f"/api/jobs/{job['job_id']}/result").status_code == 200
+
+
+def test_full_store_is_429(client, gate) -> None:
+    client.application.extensions["scan_jobs"] = JobStore(workers=2, max_jobs=2)
+    for _ in range(2):
+        assert client.post("/api/jobs", json={"workflow": WORKFLOW}).status_code == 202
+    r = client.post("/api/jobs", json={"workflow": WORKFLOW})
+    assert r.status_code == 429
+    assert r.headers["Retry-After"]
+    assert r.get_json()["error"] == "too_many_jobs"
+
+
+def test_invalid_job_request(client) -> None:
+    assert client.post("/api/jobs", json={"items": []}).status_code == 400
+
+
+def test_finished_jobs_are_evicted_for_new_ones() -> None:
+    store = JobStore(workers=1, max_jobs=2)
+    first = store.submit(1, lambda job: {"n": 1})
+    second = store.submit(1, lambda job: {"n": 2})
+    for _ in range(200):
+        if first.finished_at and second.finished_at:
+            break
+        time.sleep(0.01)
+    third = store.submit(1, lambda job: {"n": 3})
+    assert third is not None
+    assert store.get(first.job_id) is None
+    assert store.get(second.job_id) is second
+
+
+def test_result_bytes_are_bounded() -> None:
+    store = JobStore(workers=1, max_jobs=10, max_result_bytes=30)
+    done = [store.submit(1, lambda job: {"x": "a" * 10}) for _ in range(3)]
+    for _ in range(200):
+        if all(j.finished_at for j in done):
+            break
+        time.sleep(0.01)
+    kept = [j for j in done if store.get(j.job_id) is not None]
+    assert kept == [done[-1]]
+    assert store.result_bytes == len(done[-1].result)
+
+
+def test_ttl_expiry(client, monkeypatch: pytest.MonkeyPatch) -> None:
+    store = JobStore(workers=1, ttl=60)
+    client.application.extensions["scan_jobs"] = store
+    job = client.post("/api/jobs", json={"workflow": WORKFLOW}).get_json()
+    finished = _wait(client, job["job_id"])
+    assert finished["expires_at"] == pytest.approx(finished["finished_at"] + 60)
+
+    now = finished["finished_at"] + 61
+    monkeypatch.setattr(jobs_mod.time, "time", lambda: now)
+    assert client.get(f"/api/jobs/{job['job_id']}").status_code == 404
+    assert store.result_bytes == 0
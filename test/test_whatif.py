@@ -0,0 +1,90 @@
+"""Policy what-if matrix: library, CLI and API."""
+from __future__ import annotations
+
+import json
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+from scanner.cli import main
+from scanner.engine import controls_for_level, run_controls
+from scanner.ir.derivation import derive_workflow
+from scanner.ir.parser import parse_workflow_yaml
+from scanner.policy import PRESET_NAMES
+from scanner.whatif import WhatIfReport, candidate_policies, whatif_text
+
+CASES = Path(__file__).resolve().parent / "scan-test-cases"
+
+
+def test_whatif_text_matches_separate_scans(workflow_file: Path) -> None:
+    text = workflow_file.read_text(encoding="utf-8")
+    controls = controls_for_level("L3")
+    policies = candidate_policies("L3", PRESET_NAMES, {"custom": {"forbid_set_x": False}})
+    tally = whatif_text(str(workflow_file), text, controls, policies)
+    wf = derive_workflow(parse_workflow_yaml(str(workflow_file), text))
+    for name, policy in policies.items():
+        expected = Counter((f.control_id, f.status) for f in run_controls(wf, controls, policy))
+        assert tally[name] == expected, name
+
+
+def test_report_deltas_against_baseline() -> None:
+    report = WhatIfReport("L1", ["a", "b"], baseline="a")
+    report.add({"a": Counter({("L1-01", "FAIL"): 1}), "b": Counter({("L1-01", "FAIL"): 3, ("L1-02", "WARN"): 1})})
+    report.add({"a": Counter(), "b": Counter({("L1-02", "FAIL"): 1})})
+    a, b = report.rows()
+    assert (a["delta_fail"], a["fail_delta_by_control"]) == (0, {})
+    assert (b["FAIL"], b["files_failing"], b["delta_fail"], b["delta_warn"]) == (4, 2, 3, 1)
+    assert b["fail_delta_by_control"] == {"L1-01": 2, "L1-02": 1}
+    assert "level=L1 files=2 baseline=a" in report.format_table()
+
+
+def test_custom_name_colliding_with_preset_is_rejected() -> None:
+    with pytest.raises(ValueError, match="strict"):
+        candidate_policies("L1", ["default"], {"strict": {}})
+
+
+def test_cli_table_and_json(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    assert main(["whatif", str(CASES), "--level", "L2", "--jobs", "1", "--no-ignore"]) == 0
+    table = capsys.readouterr().out
+    for name in PRESET_NAMES:
+        assert f"\n{name}" in table
+
+    policy = tmp_path / "tight.yml"
+    policy.write_text("forbid_set_x: true\n", encoding="utf-8")
+    out = tmp_path / "report.json"
+    argv = ["whatif", str(CASES), "--preset", "relaxed", "--policy", str(policy), "--format", "json",
+            "--out", str(out), "--jobs", "1"]
+    assert main(argv) == 0
+    report = json.loads(out.read_text(encoding="utf-8"))
+    assert report["baseline"] == "relaxed"
+    assert [r["policy"] for r in report["policies"]] == ["relaxed", "tight"]
+    assert report["files"] == len(list(CASES.glob("*.yml")))
+
+
+def test_cli_rejects_preset_named_policy(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    policy = tmp_path / "strict.yml"
+    policy.write_text("{}\n", encoding="utf-8")
+    assert main(["whatif", str(CASES), "--policy", str(policy), "--jobs", "1"]) == 2
+    assert "collide" in capsys.readouterr().err
+    assert main(["whatif", str(CASES), "--baseline", "nope", "--jobs", "1"]) == 2
+
+
+def test_api_whatif(client) -> None:
+    wf = (CASES / "case-l1-01-tag.yml").read_text(encoding="utf-8")
+    r = client.post("/api/whatif", json={
+        "workflows": [{"file_path": "a.yml", "workflow": wf}, {"file_path": "b.yml", "workflow": wf}],
+        "presets": ["default"],
+        "policies": {"tight": {"forbid_set_x": True}},
+    })
+    assert r.status_code == 200
+    body = r.get_json()
+    assert body["files"] == 2
+    assert [row["policy"] for row in body["policies"]] == ["default", "tight"]
+
+    r = client.post("/api/whatif", json={"workflow": wf, "policies": {"default": {}}})
+    assert r.status_code == 400
+    assert "collide" in r.get_json()["message"]
+
+    r = client.post("/api/whatif", json={"workflow": wf, "baseline": "nope"})
+    assert r.status_code == 400
@@ -0,0 +1,32 @@
+"""CSafeLoader and the pure-Python SafeLoader must build the same WorkflowIR."""
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+import yaml
+
+from scanner.engine import controls_for_level, policy_for_level, run_controls
+from scanner.ir.derivation import derive_workflow
+from scanner.ir.parser import parse_workflow_yaml
+from scanner.policy.compiled import CompiledPolicy
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(yaml, "CSafeLoader"), reason="PyYAML built without libyaml"
+)
+
+
+def _parse(path: Path, loader: type) -> object:
+    return derive_workflow(parse_workflow_yaml(str(path), path.read_text(encoding="utf-8"), loader=loader))
+
+
+def test_loaders_build_identical_ir(workflow_file: Path) -> None:
+    assert _parse(workflow_file, yaml.CSafeLoader) == _parse(workflow_file, yaml.SafeLoader)
+
+
+def test_loaders_produce_identical_findings(workflow_file: Path) -> None:
+    controls = controls_for_level("L3")
+    policy = CompiledPolicy.from_dict(policy_for_level("L3"))
+    pure = run_controls(_parse(workflow_file, yaml.SafeLoader), controls, policy)
+    fast = run_controls(_parse(workflow_file, yaml.CSafeLoader), controls, policy)
+    assert [f.to_dict() for f in fast] == [f.to_dict() for f in pure]
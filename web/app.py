@@ -3,11 +3,16 @@ from __future__ import annotations
 import os
 from flask import Flask, jsonify
 
+from scanner.ir.cache import IR_CACHE, WEB_DEFAULT_MB, max_bytes_from_env
+
 from .routes.health import bp as health_bp
 from .routes.scan import bp as scan_bp
 from .routes.ui import bp as ui_bp
 from .errors import register_error_handlers
 from .routes.policy import bp as policy_bp
+from .routes.jobs import bp as jobs_bp
+from .jobs import JobStore
+from .response_cache import ResponseCache
 
 
 def create_app() -> Flask:
@@ -16,12 +21,30 @@ def create_app() -> Flask:
     # Basic hardening
     max_bytes = int(os.environ.get("MAX_REQUEST_BYTES", str(1 * 1024 * 1024)))  # 1MB default
     app.config["MAX_CONTENT_LENGTH"] = max_bytes
+    app.config["MAX_BATCH_ITEMS"] = int(os.environ.get("MAX_BATCH_ITEMS", "500"))
+
+    # Serialized /api/scan and /api/scan/file responses, keyed by their ETag.
+    app.extensions["response_cache"] = ResponseCache(
+        max_bytes=int(float(os.environ.get("RESPONSE_CACHE_MAX_MB", "32")) * 1024 * 1024),
+    )
+
+    # Parsed IR reuse across levels, policies and filters; worker processes inherit the size.
+    IR_CACHE.max_bytes = max_bytes_from_env(WEB_DEFAULT_MB)
+
+    # Background scan jobs (/api/jobs), kept in this process.
+    app.extensions["scan_jobs"] = JobStore(
+        workers=int(os.environ.get("SCAN_JOB_WORKERS", "2")),
+        max_jobs=int(os.environ.get("SCAN_JOB_LIMIT", "32")),
+        ttl=float(os.environ.get("SCAN_JOB_TTL_SECONDS", "3600")),
+        max_result_bytes=int(float(os.environ.get("SCAN_JOB_RESULTS_MAX_MB", "256")) * 1024 * 1024),
+    )
 
     # Register blueprints
     app.register_blueprint(ui_bp)
     app.register_blueprint(health_bp, url_prefix="/api")
     app.register_blueprint(scan_bp, url_prefix="/api")
     app.register_blueprint(policy_bp, url_prefix="/api")
+    app.register_blueprint(jobs_bp, url_prefix="/api")
 
     @app.errorhandler(413)
     def too_large(_):
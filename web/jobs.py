@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+JOB_STATUSES = ("queued", "running", "done", "failed")
+
+
+@dataclass
+class Job:
+    job_id: str
+    total: int
+    done: int = 0
+    status: str = "queued"
+    created_at: float = 0.0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+    result: Optional[bytes] = None  # the finished response, serialized once
+
+    def advance(self) -> None:
+        self.done += 1
+
+    def to_dict(self, ttl: float) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "total": self.total,
+            "done": self.done,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "expires_at": self.finished_at + ttl if self.finished_at is not None else None,
+            **({"error": self.error} if self.error else {}),
+        }
+
+
+class JobStore:
+    """In-process scan jobs: a bounded thread pool runs them, results live for `ttl` seconds.
+
+    Each job thread drives the scan (which itself fans out to the worker processes in
+    `web.workers`), so `workers` bounds how many jobs scan at once. The store holds at
+    most `max_jobs` jobs, finished ones included, and at most `max_result_bytes` of
+    serialized results. Finished jobs are dropped `ttl` seconds after they finish, or
+    earlier, oldest first, when a new job or result needs the room; `submit` refuses a
+    job only when every held job is still queued or running.
+    """
+
+    def __init__(
+        self,
+        *,
+        workers: int = 2,
+        max_jobs: int = 32,
+        ttl: float = 3600.0,
+        max_result_bytes: int = 256 * 1024 * 1024,
+    ) -> None:
+        self.ttl = ttl
+        self.max_jobs = max_jobs
+        self.max_result_bytes = max_result_bytes
+        self.result_bytes = 0
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scan-job")
+
+    def submit(self, total: int, run: Callable[[Job], Dict[str, Any]], *, done: int = 0) -> Optional[Job]:
+        """Queue `run(job)`; its return value becomes the job's JSON result. None if the store is full."""
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            self._evict(max_jobs=self.max_jobs - 1)
+            if len(self._jobs) >= self.max_jobs:
+                return None
+            job = Job(job_id=uuid.uuid4().hex, total=total, done=done, created_at=now)
+            self._jobs[job.job_id] = job
+        self._executor.submit(self._run, job, run)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            self._expire(time.time())
+            return self._jobs.get(job_id)
+
+    def _run(self, job: Job, run: Callable[[Job], Dict[str, Any]]) -> None:
+        job.status = "running"
+        job.started_at = time.time()
+        result: Optional[bytes] = None
+        try:
+            result = json.dumps(run(job)).encode("utf-8")
+            status = "done"
+        except Exception as e:  # reported on the job; the pool thread must survive
+            job.error = f"{type(e).__name__}: {e}"
+            status = "failed"
+        with self._lock:
+            if result is not None:
+                job.result = result
+                self.result_bytes += len(result)
+            # finished_at first: readers treat a job with a final status as finished.
+            job.finished_at = time.time()
+            job.status = status
+            # The newest result is kept even if it alone exceeds the budget.
+            self._evict(max_bytes=self.max_result_bytes, keep=job.job_id)
+
+    def _drop(self, job_id: str) -> None:
+        job = self._jobs.pop(job_id)
+        if job.result is not None:
+            self.result_bytes -= len(job.result)
+
+    def _evict(self, *, max_jobs: Optional[int] = None, max_bytes: Optional[int] = None, keep: str = "") -> None:
+        """Drop finished jobs, oldest first, until both limits hold or none are left."""
+        def over() -> bool:
+            return (max_jobs is not None and len(self._jobs) > max_jobs) or (
+                max_bytes is not None and self.result_bytes > max_bytes
+            )
+
+        if not over():
+            return
+        finished = sorted(
+            (j for j in self._jobs.values() if j.finished_at is not None and j.job_id != keep),
+            key=lambda j: j.finished_at,
+        )
+        for j in finished:
+            if not over():
+                break
+            self._drop(j.job_id)
+
+    def _expire(self, now: float) -> None:
+        expired = [k for k, j in self._jobs.items() if j.finished_at is not None and now - j.finished_at > self.ttl]
+        for k in expired:
+            self._drop(k)
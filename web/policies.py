@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import json
+import os
+from functools import lru_cache
+from typing import Any, Dict
+
+from scanner.policy import get_preset_policy, validate_policy
+
+POLICY_CACHE_SIZE = int(os.environ.get("POLICY_CACHE_SIZE", "256"))
+
+
+def validated_policy(level: str, preset: str, policy_raw: Dict[str, Any]) -> Dict[str, Any]:
+    """Preset overrides for `level` merged with `policy_raw` (explicit wins), then validated.
+
+    Memoized on the canonical JSON of the request policy, so the handful of policies most
+    clients send skip pydantic after the first request. The returned dict is shared between
+    requests and must not be modified. Raises PolicyValidationError (not cached).
+    """
+    return _validated(level, preset, json.dumps(policy_raw, sort_keys=True, separators=(",", ":")))
+
+
+@lru_cache(maxsize=POLICY_CACHE_SIZE)
+def _validated(level: str, preset: str, policy_key: str) -> Dict[str, Any]:
+    return validate_policy({**get_preset_policy(level, preset), **json.loads(policy_key)})
+
+
+def policy_cache_stats() -> Dict[str, Any]:
+    info = _validated.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "size": info.currsize,
+        "maxsize": info.maxsize,
+        "hit_rate": round(info.hits / lookups, 4) if lookups else None,
+    }
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional
+
+from scanner.cache import code_fingerprint
+
+
+@lru_cache(maxsize=1)
+def _version() -> str:
+    """`code_fingerprint()` plus this web package's source, which shapes the response body."""
+    h = hashlib.sha256(code_fingerprint().encode("utf-8"))
+    root = Path(__file__).resolve().parent
+    for p in sorted(root.rglob("*.py")):
+        h.update(p.relative_to(root).as_posix().encode("utf-8"))
+        h.update(hashlib.sha256(p.read_bytes()).digest())
+    return h.hexdigest()
+
+
+def response_etag(workflow: str, params: Mapping[str, Any]) -> str:
+    """Strong ETag for a scan response: sha256 over the workflow text and every input that shapes the body.
+
+    A scan is a pure function of these inputs and the scanner code, so equal tags mean
+    byte-identical responses. The version hashes the scanner and web source, so a deploy
+    that changes the rules or the response shape invalidates tags clients already hold.
+    """
+    h = hashlib.sha256()
+    h.update(hashlib.sha256(workflow.encode("utf-8")).digest())
+    h.update(json.dumps({**params, "version": _version()}, sort_keys=True, separators=(",", ":")).encode("utf-8"))
+    return h.hexdigest()
+
+
+class ResponseCache:
+    """Bounded in-process LRU of serialized scan responses, keyed by `response_etag`.
+
+    Entries are accounted by body size; the least recently used ones are evicted once
+    the total exceeds `max_bytes`. `max_bytes=0` disables caching.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, etag: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._entries.get(etag)
+            if data is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(etag)
+            self.hits += 1
+            return data
+
+    def put(self, etag: str, data: bytes) -> None:
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(etag, None)
+            if old is not None:
+                self.bytes -= len(old)
+            self._entries[etag] = data
+            self.bytes += len(data)
+            while self.bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= len(evicted)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+        }
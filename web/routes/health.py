@@ -1,10 +1,24 @@
 from __future__ import annotations
 
-from flask import Blueprint, jsonify
+from flask import Blueprint, current_app, jsonify
+
+from scanner import __version__
+from scanner.ir.cache import IR_CACHE
+from scanner.ir.parser import YAML_LOADER
+
+from ..policies import policy_cache_stats
 
 bp = Blueprint("health", __name__)
 
 
 @bp.get("/health")
 def health():
-    return jsonify({"status": "ok"})
+    return jsonify({
+        "status": "ok",
+        "version": __version__,
+        "yaml_loader": YAML_LOADER,
+        "policy_cache": policy_cache_stats(),
+        "response_cache": current_app.extensions["response_cache"].stats(),
+        # Worker processes (batch and job scans) keep their own caches, not counted here.
+        "ir_cache": {**IR_CACHE.stats(), "scope": "web_process"},
+    })
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+from flask import Blueprint, Response, current_app, jsonify, request, url_for
+
+from ..jobs import Job, JobStore
+from ..workers import iter_scan_items
+from .scan import _parse_batch
+
+bp = Blueprint("jobs", __name__)
+
+
+def _store() -> JobStore:
+    return current_app.extensions["scan_jobs"]
+
+
+@bp.post("/jobs")
+def create_job():
+    """Start a background scan and return its job ID right away (202).
+
+    JSON body: the `/api/scan/batch` body (`items` plus shared options), or a single
+    `/api/scan` body (`workflow`, `file_path`, ...). Poll `GET /api/jobs/<id>` and fetch
+    the batch-shaped result from `GET /api/jobs/<id>/result`.
+    """
+    payload = request.get_json(silent=True) or {}
+    if not isinstance(payload, dict):
+        return jsonify({"error": "invalid_request", "message": "JSON body must be an object."}), 400
+
+    items = payload.get("items")
+    if items is None and "workflow" in payload:
+        items = [{"file_path": payload.get("file_path", "workflow.yml"), "workflow": payload.get("workflow")}]
+    batch, err = _parse_batch(payload, items)
+    if err:
+        body, code = err
+        return jsonify(body), code
+    assert batch is not None
+
+    def run(job: Job):
+        return batch.respond(iter_scan_items(batch.tasks), on_item=job.advance)
+
+    store = _store()
+    job = store.submit(len(batch.results), run, done=len(batch.results) - len(batch.tasks))
+    if job is None:
+        resp = jsonify({"error": "too_many_jobs", "message": f"{store.max_jobs} jobs already queued or running."})
+        resp.headers["Retry-After"] = "5"
+        return resp, 429
+
+    body = job.to_dict(store.ttl)
+    body["links"] = {
+        "self": url_for("jobs.get_job", job_id=job.job_id),
+        "result": url_for("jobs.get_job_result", job_id=job.job_id),
+    }
+    resp = jsonify(body)
+    resp.headers["Location"] = body["links"]["self"]
+    return resp, 202
+
+
+@bp.get("/jobs/<job_id>")
+def get_job(job_id: str):
+    store = _store()
+    job = store.get(job_id)
+    if job is None:
+        return jsonify({"error": "job_not_found", "message": "Unknown or expired job."}), 404
+    return jsonify(job.to_dict(store.ttl)), 200
+
+
+@bp.get("/jobs/<job_id>/result")
+def get_job_result(job_id: str):
+    store = _store()
+    job = store.get(job_id)
+    if job is None:
+        return jsonify({"error": "job_not_found", "message": "Unknown or expired job."}), 404
+    if job.status == "failed":
+        return jsonify({"error": "job_failed", "message": job.error}), 500
+    if job.result is None:
+        return jsonify({"error": "job_not_finished", **job.to_dict(store.ttl)}), 409
+    return Response(
+        job.result,
+        mimetype="application/json",
+        headers={"Content-Disposition": f'attachment; filename="scan-{job.job_id}.json"'},
+    )
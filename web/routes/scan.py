@@ -1,12 +1,19 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional, Set
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
 import json
 
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, current_app, jsonify, request
 
-from scanner.engine import scan_workflow_text, LEVELS
-from scanner.policy import validate_policy, PolicyValidationError, PRESET_NAMES, get_preset_policy
+from scanner.engine import controls_for_level, parse_control_patterns, scan_workflow_levels, select_controls, LEVELS
+from scanner.policy import validate_policy, PolicyValidationError, PRESET_NAMES
+from scanner.findings import Finding, RuleCatalog
+from scanner.whatif import WhatIfReport, candidate_policies, whatif_text
+
+from ..policies import validated_policy
+from ..response_cache import ResponseCache, response_etag
+from ..workers import BatchItem, ItemOutcome, iter_scan_items
 
 
 bp = Blueprint("scan", __name__, url_prefix="/api")
@@ -33,10 +40,10 @@ def _coerce_status_set(value: Any) -> Optional[Set[str]]:
     return None
 
 
-def _filter_findings(findings: List[Dict[str, Any]], only_status: Optional[Set[str]]) -> List[Dict[str, Any]]:
+def _filter_findings(findings: List[Finding], only_status: Optional[Set[str]]) -> List[Finding]:
     if not only_status:
         return findings
-    return [f for f in findings if str(f.get("status", "")).upper() in only_status]
+    return [f for f in findings if f.status.upper() in only_status]
 
 
 def _validate_level(level_raw: Any) -> tuple[Optional[str], Optional[tuple[Dict[str, Any], int]]]:
@@ -50,6 +57,91 @@ def _validate_level(level_raw: Any) -> tuple[Optional[str], Optional[tuple[Dict[
     return level, None
 
 
+def _validate_levels(level_raw: Any) -> tuple[Optional[List[str]], Optional[tuple[Dict[str, Any], int]]]:
+    """Accept a level, a comma-separated string ("L1,L2") or a list of levels."""
+    if level_raw is None:
+        return ["L1"], None
+    if isinstance(level_raw, str):
+        parts: List[Any] = level_raw.split(",")
+    elif isinstance(level_raw, list) and level_raw:
+        parts = level_raw
+    else:
+        return None, ({"error": "invalid_request", "message": "`level` must be a string or a non-empty list of strings."}, 400)
+    levels: List[str] = []
+    for part in parts:
+        level, err = _validate_level(part)
+        if err:
+            return None, err
+        assert level is not None
+        if level not in levels:
+            levels.append(level)
+    return levels, None
+
+
+def _validate_controls(value: Any, field: str) -> tuple[Optional[tuple[str, ...]], Optional[tuple[Dict[str, Any], int]]]:
+    """Accept control IDs/globs as a list or a comma-separated string; None selects everything."""
+    if value is None:
+        return None, None
+    if not isinstance(value, (str, list)) or (isinstance(value, list) and not all(isinstance(x, str) for x in value)):
+        return None, ({"error": "invalid_request", "message": f"`{field}` must be a string or a list of strings."}, 400)
+    patterns = parse_control_patterns(value)
+    try:
+        select_controls([], patterns)
+    except ValueError as e:
+        return None, ({"error": "invalid_request", "message": str(e)}, 400)
+    return patterns, None
+
+
+def _merged_policies(
+    levels: List[str],
+    preset: str,
+    policy_raw: Dict[str, Any],
+) -> tuple[Optional[Dict[str, Dict[str, Any]]], Optional[tuple[Dict[str, Any], int]]]:
+    """Per-level policy: preset overrides for the level, then explicit overrides (explicit wins)."""
+    policies: Dict[str, Dict[str, Any]] = {}
+    for level in levels:
+        try:
+            policies[level] = validated_policy(level, preset, policy_raw)
+        except PolicyValidationError as e:
+            return None, ({"error": "policy_invalid", "message": str(e)}, 400)
+    return policies, None
+
+
+def _scan_response(
+    levels: List[str],
+    grouped: bool,
+    findings_by_level: Dict[str, List[Any]],
+    only_status: Optional[Set[str]],
+    rules_catalog: bool = False,
+    *,
+    catalog: Optional[RuleCatalog] = None,
+    **extra: Any,
+) -> Dict[str, Any]:
+    """Response body for one workflow. With `catalog`, findings are compacted into it (the caller emits
+    `catalog.rules`); otherwise `rules_catalog` builds and includes a catalog of its own."""
+    catalog_out: Dict[str, Any] = {}
+    if catalog is None and rules_catalog:
+        catalog = RuleCatalog()
+        catalog_out["rules"] = catalog.rules
+
+    def to_dict(f: Finding) -> Dict[str, Any]:
+        return catalog.add(f)[0] if catalog is not None else f.to_dict()
+
+    per_level = [
+        {"level": level, "findings": [to_dict(f) for f in _filter_findings(findings_by_level[level], only_status)]}
+        for level in levels
+    ]
+    if grouped:
+        return {"levels": levels, **extra, "results": per_level, **catalog_out}
+    return {"level": levels[0], **extra, "findings": per_level[0]["findings"], **catalog_out}
+
+
+def _coerce_bool(value: Any) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() in {"1", "true", "yes", "on"}
+    return bool(value)
+
+
 def _validate_policy(policy_raw: Any) -> tuple[Optional[Dict[str, Any]], Optional[tuple[Dict[str, Any], int]]]:
     if policy_raw is None:
         policy_raw = {}
@@ -73,6 +165,28 @@ def _validate_policy_preset(preset_raw: Any) -> tuple[Optional[str], Optional[tu
     return preset, None
 
 
+def _cached_response(workflow: str, params: Dict[str, Any], build: Callable[[], Dict[str, Any]]) -> Response:
+    """Serve a scan response from the response cache, or `build()` and cache it.
+
+    `params` must hold every request input besides the workflow text that shapes the
+    response. The strong ETag is derived from them, so a matching If-None-Match gets a
+    304 without a cache lookup or scan.
+    """
+    cache: ResponseCache = current_app.extensions["response_cache"]
+    etag = response_etag(workflow, params)
+    if request.if_none_match.contains_weak(etag):
+        cache.not_modified += 1
+        resp = Response(status=304)
+    else:
+        data = cache.get(etag)
+        if data is None:
+            data = jsonify(build()).get_data()
+            cache.put(etag, data)
+        resp = Response(data, mimetype="application/json")
+    resp.set_etag(etag)
+    return resp
+
+
 @bp.route("/scan", methods=["GET", "POST"])
 def scan():
     if request.method == "GET":
@@ -87,14 +201,21 @@ def scan():
                     "methods": ["POST"],
                     "content_type": "multipart/form-data",
                 },
+                "/api/scan/batch": {
+                    "methods": ["POST"],
+                    "content_type": "application/json",
+                },
             },
             "scan_body_schema": {
-                "level": "L1|L2|L3 (default: L1)",
+                "level": "L1|L2|L3 (default: L1), or a list / comma-separated string of levels",
                 "policy_preset": "default|strict|relaxed (optional)",
                 "file_path": "string (optional)",
                 "workflow": "string (required) - GitHub Actions YAML text",
                 "policy": "object (optional) - policy override",
                 "only_status": ["FAIL", "WARN", "PASS", "SKIP"],
+                "controls": "list or comma-separated control IDs/globs to run (optional), e.g. [\"L1-01\", \"L1-02\"]",
+                "skip_controls": "list or comma-separated control IDs/globs to skip (optional)",
+                "rules_catalog": "bool (optional) - explanations once per rule_id in a top-level `rules` object",
             },
             "scan_example_curl": (
                 "curl -s -X POST http://localhost:5001/api/scan \\n"
@@ -113,11 +234,12 @@ def scan():
     if not isinstance(payload, dict):
         return jsonify({"error": "invalid_request", "message": "JSON body must be an object."}), 400
 
-    level, err = _validate_level(payload.get("level", "L1"))
+    level_raw = payload.get("level", "L1")
+    levels, err = _validate_levels(level_raw)
     if err:
         body, code = err
         return jsonify(body), code
-    assert level is not None
+    assert levels is not None
 
     preset, err = _validate_policy_preset(payload.get("policy_preset"))
     if err:
@@ -140,32 +262,38 @@ def scan():
     if not isinstance(user_policy_raw, dict):
         return jsonify({"error": "invalid_request", "message": "`policy` must be an object if provided."}), 400
 
-    merged_policy_raw: Dict[str, Any] = {
-        **get_preset_policy(level, preset),
-        **user_policy_raw,
-    }
-
-    try:
-        merged_policy = validate_policy(merged_policy_raw)
-    except PolicyValidationError as e:
-        return jsonify({"error": "policy_invalid", "message": str(e)}), 400
+    policies, err = _merged_policies(levels, preset, user_policy_raw)
+    if err:
+        body, code = err
+        return jsonify(body), code
+    assert policies is not None
 
     only_status = _coerce_status_set(payload.get("only_status"))
 
-    findings = scan_workflow_text(
-        file_path=file_path,
-        text=workflow,
-        policy=merged_policy,
-        level=level,
-    )
+    only_controls, err = _validate_controls(payload.get("controls"), "controls")
+    if err:
+        body, code = err
+        return jsonify(body), code
+    skip_controls, err = _validate_controls(payload.get("skip_controls"), "skip_controls")
+    if err:
+        body, code = err
+        return jsonify(body), code
+
+    grouped = isinstance(level_raw, list) or len(levels) > 1
+    rules_catalog = _coerce_bool(payload.get("rules_catalog", False))
 
-    findings_dict = _filter_findings([f.to_dict() for f in findings], only_status)
+    def build() -> Dict[str, Any]:
+        # One parse+derive shared by every requested level; unselected controls never run.
+        findings_by_level = scan_workflow_levels(
+            file_path, workflow, policies, controls=only_controls, skip_controls=skip_controls,
+        )
+        return _scan_response(levels, grouped, findings_by_level, only_status, rules_catalog, policy_preset=preset)
 
-    return jsonify({
-        "level": level,
-        "policy_preset": preset,
-        "findings": findings_dict,
-    }), 200
+    return _cached_response(workflow, {
+        "endpoint": "scan", "file_path": file_path, "levels": levels, "grouped": grouped, "preset": preset,
+        "policies": policies, "only_status": sorted(only_status or ()), "controls": only_controls,
+        "skip_controls": skip_controls, "rules_catalog": rules_catalog,
+    }, build)
 
 
 @bp.route("/scan/file", methods=["POST"])
@@ -174,11 +302,13 @@ def scan_file():
 
     Form fields:
       - file: required (YAML file)
-      - level: optional (L1|L2|L3), default L1
+      - level: optional (L1|L2|L3 or "L1,L2,L3"), default L1
       - only_status: optional ("fail,warn" or "FAIL,WARN")
       - file_path: optional (override the returned file_path; defaults to uploaded filename)
       - policy: optional (JSON string of policy override)
       - policy_preset: optional (default|strict|relaxed)
+      - controls / skip_controls: optional ("L1-01,L1-02" or globs such as "L2-*")
+      - rules_catalog: optional ("true" to move explanations into a top-level `rules` catalog)
     """
     upload = request.files.get("file")
     if upload is None:
@@ -197,11 +327,11 @@ def scan_file():
     if not workflow.strip():
         return jsonify({"error": "invalid_request", "message": "Uploaded file is empty."}), 400
 
-    level, err = _validate_level(request.form.get("level", "L1"))
+    levels, err = _validate_levels(request.form.get("level", "L1"))
     if err:
         body, code = err
         return jsonify(body), code
-    assert level is not None
+    assert levels is not None
 
     file_path = request.form.get("file_path") or (upload.filename or "workflow.yml")
     if not isinstance(file_path, str) or not file_path.strip():
@@ -226,28 +356,245 @@ def scan_file():
             return jsonify({"error": "invalid_request", "message": "`policy` JSON must be an object."}), 400
         policy_raw = parsed
 
-    merged_policy_raw: Dict[str, Any] = {
-        **get_preset_policy(level, preset),
-        **policy_raw,
-    }
+    policies, err = _merged_policies(levels, preset, policy_raw)
+    if err:
+        body, code = err
+        return jsonify(body), code
+    assert policies is not None
 
-    try:
-        merged_policy = validate_policy(merged_policy_raw)
-    except PolicyValidationError as e:
-        return jsonify({"error": "policy_invalid", "message": str(e)}), 400
+    only_controls, err = _validate_controls(request.form.get("controls"), "controls")
+    if err:
+        body, code = err
+        return jsonify(body), code
+    skip_controls, err = _validate_controls(request.form.get("skip_controls"), "skip_controls")
+    if err:
+        body, code = err
+        return jsonify(body), code
+
+    rules_catalog = _coerce_bool(request.form.get("rules_catalog", ""))
+
+    def build() -> Dict[str, Any]:
+        findings_by_level = scan_workflow_levels(
+            file_path, workflow, policies, controls=only_controls, skip_controls=skip_controls,
+        )
+        return _scan_response(
+            levels,
+            len(levels) > 1,
+            findings_by_level,
+            only_status,
+            rules_catalog,
+            policy_preset=preset,
+            file_path=file_path,
+        )
+
+    return _cached_response(workflow, {
+        "endpoint": "scan_file", "file_path": file_path, "levels": levels, "preset": preset,
+        "policies": policies, "only_status": sorted(only_status or ()), "controls": only_controls,
+        "skip_controls": skip_controls, "rules_catalog": rules_catalog,
+    }, build)
+
+
+@dataclass
+class BatchRequest:
+    """A validated batch: options shared by every item, plus the items to scan.
+
+    Malformed items are resolved to error entries up front; only `tasks` go to the workers.
+    """
+
+    levels: List[str]
+    grouped: bool
+    preset: str
+    only_status: Optional[Set[str]]
+    rules_catalog: bool
+    results: List[Optional[Dict[str, Any]]]
+    tasks: List[BatchItem] = field(default_factory=list)
+    task_index: List[int] = field(default_factory=list)
+
+    def respond(self, outcomes: Iterable[ItemOutcome], on_item: Optional[Callable[[], None]] = None) -> Dict[str, Any]:
+        """Assemble the batch response from `scan_item` outcomes (in task order)."""
+        results = list(self.results)
+        # One catalog for the whole batch rather than one per item.
+        catalog = RuleCatalog() if self.rules_catalog else None
+        for i, task, (findings_by_level, error) in zip(self.task_index, self.tasks, outcomes):
+            if findings_by_level is None:
+                results[i] = {"file_path": task[0], "error": "scan_failed", "message": error}
+            else:
+                results[i] = _scan_response(
+                    self.levels, self.grouped, findings_by_level, self.only_status, catalog=catalog, file_path=task[0],
+                )
+            if on_item is not None:
+                on_item()
+
+        response: Dict[str, Any] = {
+            "levels" if self.grouped else "level": self.levels if self.grouped else self.levels[0],
+            "policy_preset": self.preset,
+            "count": len(results),
+            "errors": sum(1 for r in results if r is not None and "error" in r),
+            "items": results,
+        }
+        if catalog is not None:
+            response["rules"] = catalog.rules
+        return response
+
+
+def _parse_batch(payload: Dict[str, Any], items: Any) -> tuple[Optional[BatchRequest], Optional[tuple[Dict[str, Any], int]]]:
+    """Validate the shared scan options in `payload` once, then each of `items`."""
+    level_raw = payload.get("level", "L1")
+    levels, err = _validate_levels(level_raw)
+    if err:
+        return None, err
+    assert levels is not None
+
+    preset, err = _validate_policy_preset(payload.get("policy_preset"))
+    if err:
+        return None, err
+    assert preset is not None
 
-    findings = scan_workflow_text(
-        file_path=file_path,
-        text=workflow,
-        policy=merged_policy,
-        level=level,
+    user_policy_raw = payload.get("policy") or {}
+    if not isinstance(user_policy_raw, dict):
+        return None, ({"error": "invalid_request", "message": "`policy` must be an object if provided."}, 400)
+    policies, err = _merged_policies(levels, preset, user_policy_raw)
+    if err:
+        return None, err
+    assert policies is not None
+
+    only_controls, err = _validate_controls(payload.get("controls"), "controls")
+    if err:
+        return None, err
+    skip_controls, err = _validate_controls(payload.get("skip_controls"), "skip_controls")
+    if err:
+        return None, err
+
+    if not isinstance(items, list) or not items:
+        return None, ({"error": "invalid_request", "message": "`items` must be a non-empty list."}, 400)
+    max_items = current_app.config["MAX_BATCH_ITEMS"]
+    if len(items) > max_items:
+        return None, ({"error": "invalid_request", "message": f"Too many items ({len(items)}). MAX_BATCH_ITEMS={max_items}"}, 400)
+
+    batch = BatchRequest(
+        levels=levels,
+        grouped=isinstance(level_raw, list) or len(levels) > 1,
+        preset=preset,
+        only_status=_coerce_status_set(payload.get("only_status")),
+        rules_catalog=_coerce_bool(payload.get("rules_catalog", False)),
+        results=[None] * len(items),
     )
+    for i, item in enumerate(items):
+        file_path = item.get("file_path", f"workflow-{i}.yml") if isinstance(item, dict) else None
+        workflow = item.get("workflow") if isinstance(item, dict) else None
+        if not isinstance(file_path, str):
+            batch.results[i] = {"file_path": None, "error": "invalid_item", "message": "Each item must be an object with a string `file_path`."}
+        elif not isinstance(workflow, str) or not workflow.strip():
+            batch.results[i] = {"file_path": file_path, "error": "invalid_item", "message": "`workflow` must be a non-empty string containing YAML text."}
+        else:
+            batch.tasks.append((file_path, workflow, policies, (only_controls, skip_controls)))
+            batch.task_index.append(i)
+    return batch, None
+
+
+@bp.route("/scan/batch", methods=["POST"])
+def scan_batch():
+    """Scan many workflows under one level/preset/policy in a single request.
+
+    JSON body: the `/api/scan` fields except `workflow`/`file_path`, plus
+      - items: [{"file_path": ..., "workflow": ...}, ...] (required, at most MAX_BATCH_ITEMS)
+
+    The policy is validated once for the whole batch and items are scanned across the
+    server's worker processes. Each entry of `items` in the response is either the
+    `/api/scan` response for that workflow or `{"file_path", "error", "message"}`.
+    """
+    payload = request.get_json(silent=True) or {}
+    if not isinstance(payload, dict):
+        return jsonify({"error": "invalid_request", "message": "JSON body must be an object."}), 400
 
-    findings_dict = _filter_findings([f.to_dict() for f in findings], only_status)
+    batch, err = _parse_batch(payload, payload.get("items"))
+    if err:
+        body, code = err
+        return jsonify(body), code
+    assert batch is not None
+
+    return jsonify(batch.respond(iter_scan_items(batch.tasks))), 200
+
+
+@bp.route("/whatif", methods=["POST"])
+def whatif():
+    """Grade workflows under several candidate policies, parsing each workflow once.
+
+    JSON body:
+      - workflow: YAML text (or `workflows`: [{"file_path": ..., "workflow": ...}, ...])
+      - level: optional (L1|L2|L3), default L1
+      - presets: optional list of preset names; default all presets unless `policies` is given
+      - policies: optional object mapping a candidate name to a policy override
+      - baseline: optional candidate name the deltas are relative to (default: the first)
+    """
+    payload = request.get_json(silent=True) or {}
+    if not isinstance(payload, dict):
+        return jsonify({"error": "invalid_request", "message": "JSON body must be an object."}), 400
+
+    level, err = _validate_level(payload.get("level", "L1"))
+    if err:
+        body, code = err
+        return jsonify(body), code
+    assert level is not None
 
-    return jsonify({
-        "level": level,
-        "policy_preset": preset,
-        "file_path": file_path,
-        "findings": findings_dict,
-    }), 200
+    if "workflows" in payload:
+        items = payload.get("workflows")
+        if not isinstance(items, list) or not items:
+            return jsonify({"error": "invalid_request", "message": "`workflows` must be a non-empty list."}), 400
+    else:
+        items = [{"file_path": payload.get("file_path", "workflow.yml"), "workflow": payload.get("workflow")}]
+    workflows: List[tuple[str, str]] = []
+    for item in items:
+        if not isinstance(item, dict):
+            return jsonify({"error": "invalid_request", "message": "Each workflow must be an object."}), 400
+        text = item.get("workflow")
+        path = item.get("file_path", "workflow.yml")
+        if not isinstance(text, str) or not text.strip():
+            return jsonify({"error": "invalid_request", "message": "`workflow` must be a non-empty string containing YAML text."}), 400
+        if not isinstance(path, str):
+            return jsonify({"error": "invalid_request", "message": "`file_path` must be a string."}), 400
+        workflows.append((path, text))
+
+    custom_raw = payload.get("policies") or {}
+    if not isinstance(custom_raw, dict):
+        return jsonify({"error": "invalid_request", "message": "`policies` must be an object of name -> policy."}), 400
+    custom: Dict[str, Dict[str, Any]] = {}
+    for name, policy_raw in custom_raw.items():
+        policy, err = _validate_policy(policy_raw)
+        if err:
+            body, code = err
+            return jsonify(body), code
+        assert policy is not None
+        custom[name] = policy
+
+    presets_raw = payload.get("presets")
+    if presets_raw is None:
+        presets_raw = [] if custom else list(PRESET_NAMES)
+    if not isinstance(presets_raw, list):
+        return jsonify({"error": "invalid_request", "message": "`presets` must be a list of preset names."}), 400
+    presets: List[str] = []
+    for p in presets_raw:
+        preset, err = _validate_policy_preset(p)
+        if err:
+            body, code = err
+            return jsonify(body), code
+        assert preset is not None
+        presets.append(preset)
+
+    try:
+        policies = candidate_policies(level, presets, custom)
+    except ValueError as e:
+        return jsonify({"error": "invalid_request", "message": str(e)}), 400
+    if not policies:
+        return jsonify({"error": "invalid_request", "message": "Provide at least one preset or policy."}), 400
+
+    baseline = payload.get("baseline")
+    if baseline is not None and baseline not in policies:
+        return jsonify({"error": "invalid_request", "message": f"Unknown baseline '{baseline}'. Candidates: {list(policies)}"}), 400
+
+    controls = controls_for_level(level)
+    report = WhatIfReport(level, list(policies), baseline=baseline)
+    for path, text in workflows:
+        report.add(whatif_text(path, text, controls, policies))
+
+    return jsonify(report.to_dict()), 200
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from scanner.engine import scan_workflow_levels
+from scanner.ir.cache import IR_CACHE
+from scanner.findings import Finding
+
+# Shared by every request of this server process: workers are started once, on first use,
+# and each keeps its own per-policy Scanner cache warm across requests. A pool whose worker
+# died is discarded and rebuilt on next use.
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+# Batches smaller than this are scanned in the request thread; IPC would cost more.
+MIN_PARALLEL_ITEMS = 4
+
+# (file_path, workflow text, policy per level, (controls, skip_controls))
+BatchItem = Tuple[str, str, Dict[str, Dict[str, Any]], Tuple[Optional[Tuple[str, ...]], Optional[Tuple[str, ...]]]]
+# (findings by level, None) or (None, error message)
+ItemOutcome = Tuple[Optional[Dict[str, List[Finding]]], Optional[str]]
+
+
+def worker_count() -> int:
+    """`SCAN_WORKERS` if set, else one per CPU."""
+    raw = os.environ.get("SCAN_WORKERS")
+    if raw:
+        return max(1, int(raw))
+    return os.cpu_count() or 1
+
+
+def _mp_context() -> Any:
+    # Forking a multithreaded server can copy held locks into the child; start
+    # workers from a clean process instead.
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return multiprocessing.get_context(method)
+
+
+def _init_worker(ir_cache_bytes: int) -> None:
+    IR_CACHE.max_bytes = ir_cache_bytes
+
+
+def get_pool() -> Optional[ProcessPoolExecutor]:
+    """The server's worker pool, or None when configured for a single worker."""
+    global _pool
+    workers = worker_count()
+    if workers <= 1:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=_mp_context(),
+                initializer=_init_worker,
+                initargs=(IR_CACHE.max_bytes,),
+            )
+        return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor) -> None:
+    """Forget `pool` after one of its workers died, unless another request already replaced it."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def scan_item(item: BatchItem) -> ItemOutcome:
+    """Scan one batch item. Top-level so it can be pickled into worker processes."""
+    file_path, text, policies, (only, skip) = item
+    try:
+        return scan_workflow_levels(file_path, text, policies, controls=only, skip_controls=skip), None
+    except Exception as e:  # one bad workflow must not fail the batch
+        return None, f"{type(e).__name__}: {e}"
+
+
+def iter_scan_items(items: Sequence[BatchItem]) -> Iterator[ItemOutcome]:
+    """`scan_item` over every item, in order, across the worker pool when the batch is large enough.
+
+    Outcomes are yielded as they complete, so callers can report progress. If a worker
+    process dies (OOM, a crash in the C YAML loader), the pool is rebuilt and the
+    unfinished items are retried once; items still unfinished after a second crash
+    get an error outcome.
+    """
+    pool = get_pool() if len(items) >= MIN_PARALLEL_ITEMS else None
+    if pool is None:
+        for it in items:
+            yield scan_item(it)
+        return
+    chunksize = max(1, len(items) // (worker_count() * 4))
+    done = 0
+    for attempt in range(2):
+        try:
+            for outcome in pool.map(scan_item, items[done:], chunksize=chunksize):
+                done += 1
+                yield outcome
+            return
+        except BrokenProcessPool:
+            _discard_pool(pool)
+            pool = get_pool() if attempt == 0 else None
+            if pool is None:
+                break
+    for _ in items[done:]:
+        yield None, "BrokenProcessPool: a scan worker process terminated abruptly"